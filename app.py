@@ -1,20 +1,35 @@
 
-from flask import Flask,render_template, request, redirect, url_for, session, flash, send_file, jsonify
+from flask import Flask,render_template, request, redirect, url_for, session, flash, send_file, jsonify, abort
 import mysql.connector
 from config import Config
 from services.file_upload import save_uploaded_file
 from services.sms_service import send_sms
 from utils.resume_generator import generate_resume_pdf
 from utils.translation import translator
-from utils.speech_recognition import transcribe_audio
+from utils.speech_recognition import transcribe_audio, transcribe_stream, AudioLimitError, CHUNK_SIZE
 from utils.ai_helper import AIHelper
 from utils.job_recommender import JobRecommender
 from utils.auth import Auth
+from utils.professions import PROFESSIONS_CONFIG
+from utils.llm_metrics import llm_metrics
+from utils.llm_json import get_parse_stats
+from utils.shared_cache import cache_key, shared_cache
+from utils.page_cache import page_cache
+from utils.i18n import CatalogExtension, catalog_language, catalogs, gettext
+from utils.build_catalogs import build_missing
 from services.assistant_service import assistant_bp     
+from services.tts_pool import tts_pool
+from services.tts_cache import tts_cache
+from utils.semantic_cache import semantic_cache
+from utils.stt_engines import speech_engines
+from utils.deadline import stats as deadline_stats
 
+import hmac
 import json
 import random
 import os
+import threading
+import time
 from datetime import datetime, timedelta
 
 app = Flask(__name__)
@@ -22,134 +37,43 @@ app.config.from_object(Config)
 app.secret_key = Config.SECRET_KEY
 app.register_blueprint(assistant_bp)
 
-# COMPLETE profession configuration with ALL professions
-PROFESSIONS_CONFIG = {
-    "Driver": {
-        "icon": "fas fa-truck",
-        "fields": [
-            {"name": "license_number", "label": "Driving License Number", "type": "text", "required": True},
-            {"name": "vehicle_type", "label": "Vehicle Type", "type": "select", "options": ["Car", "Motorcycle", "Truck", "Bus", "Auto Rickshaw"], "required": True},
-            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
-            {"name": "areas_covered", "label": "Areas Covered", "type": "text", "required": False},
-            {"name": "license_type", "label": "License Type", "type": "select", "options": ["LMV", "MCWG", "HMV", "Transport"], "required": True}
-        ]
-    },
-    "Electrician": {
-        "icon": "fas fa-bolt", 
-        "fields": [
-            {"name": "license_number", "label": "Electrician License Number", "type": "text", "required": True},
-            {"name": "specialization", "label": "Specialization", "type": "select", "options": ["Domestic", "Industrial", "Commercial", "Automotive"], "required": True},
-            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
-            {"name": "certifications", "label": "Certifications", "type": "text", "required": False},
-            {"name": "wiring_types", "label": "Wiring Types Known", "type": "text", "required": False}
-        ]
-    },
-    "Plumber": {
-        "icon": "fas fa-faucet",
-        "fields": [
-            {"name": "license_number", "label": "Plumber License Number", "type": "text", "required": True},
-            {"name": "specialization", "label": "Specialization", "type": "select", "options": ["Residential", "Commercial", "Industrial", "Pipeline"], "required": True},
-            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
-            {"name": "pipe_materials", "label": "Pipe Materials Worked With", "type": "text", "required": False},
-            {"name": "tools", "label": "Tools Available", "type": "text", "required": False}
-        ]
-    },
-    "Carpenter": {
-        "icon": "fas fa-hammer",
-        "fields": [
-            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
-            {"name": "specialization", "label": "Specialization", "type": "select", "options": ["Furniture", "Cabinet", "Construction", "Repair"], "required": True},
-            {"name": "wood_types", "label": "Wood Types Worked With", "type": "text", "required": False},
-            {"name": "tools", "label": "Tools Available", "type": "text", "required": False},
-            {"name": "projects_completed", "label": "Projects Completed", "type": "number", "required": False}
-        ]
-    },
-    "Mechanic": {
-        "icon": "fas fa-tools",
-        "fields": [
-            {"name": "specialization", "label": "Specialization", "type": "select", "options": ["Car", "Motorcycle", "Heavy Vehicle", "AC Repair", "General"], "required": True},
-            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
-            {"name": "certifications", "label": "Certifications", "type": "text", "required": False},
-            {"name": "tools", "label": "Tools Available", "type": "text", "required": False},
-            {"name": "brands_expertise", "label": "Brands Expertise", "type": "text", "required": False}
-        ]
-    },
-    "Welder": {
-        "icon": "fas fa-fire",
-        "fields": [
-            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
-            {"name": "welding_types", "label": "Welding Types", "type": "select", "options": ["Arc", "MIG", "TIG", "Gas", "Spot"], "required": True},
-            {"name": "materials", "label": "Materials Worked With", "type": "text", "required": False},
-            {"name": "certifications", "label": "Welding Certifications", "type": "text", "required": False},
-            {"name": "safety_training", "label": "Safety Training", "type": "select", "options": ["Yes", "No"], "required": True}
-        ]
-    },
-    "Construction Worker": {
-        "icon": "fas fa-hard-hat",
-        "fields": [
-            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
-            {"name": "specialization", "label": "Specialization", "type": "select", "options": ["Masonry", "Painting", "Welding", "Scaffolding", "General Labor"], "required": True},
-            {"name": "skills", "label": "Specific Skills", "type": "text", "required": False},
-            {"name": "tools", "label": "Tools Available", "type": "text", "required": False},
-            {"name": "safety_certifications", "label": "Safety Certifications", "type": "text", "required": False}
-        ]
-    },
-    "Painter": {
-        "icon": "fas fa-paint-roller",
-        "fields": [
-            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
-            {"name": "painting_types", "label": "Painting Types", "type": "select", "options": ["Interior", "Exterior", "Commercial", "Residential", "Industrial"], "required": True},
-            {"name": "surface_types", "label": "Surface Types", "type": "text", "required": False},
-            {"name": "tools", "label": "Tools Available", "type": "text", "required": False},
-            {"name": "brands_expertise", "label": "Paint Brands Expertise", "type": "text", "required": False}
-        ]
-    },
-    "Mason": {
-        "icon": "fas fa-ruler-combined",
-        "fields": [
-            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
-            {"name": "specialization", "label": "Specialization", "type": "select", "options": ["Brick", "Stone", "Concrete", "Tile", "All Types"], "required": True},
-            {"name": "materials", "label": "Materials Worked With", "type": "text", "required": False},
-            {"name": "tools", "label": "Tools Available", "type": "text", "required": False},
-            {"name": "projects_completed", "label": "Projects Completed", "type": "number", "required": False}
-        ]
-    },
-    "Gardener": {
-        "icon": "fas fa-seedling",
-        "fields": [
-            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
-            {"name": "specialization", "label": "Specialization", "type": "select", "options": ["Landscaping", "Lawn Care", "Tree Surgery", "Nursery", "General Gardening"], "required": True},
-            {"name": "plant_types", "label": "Plant Types Expertise", "type": "text", "required": False},
-            {"name": "tools", "label": "Gardening Tools", "type": "text", "required": False},
-            {"name": "organic_methods", "label": "Organic Methods", "type": "select", "options": ["Yes", "No"], "required": False}
-        ]
-    },
-    "Security Guard": {
-        "icon": "fas fa-shield-alt",
-        "fields": [
-            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
-            {"name": "license_number", "label": "Security License Number", "type": "text", "required": True},
-            {"name": "specialization", "label": "Specialization", "type": "select", "options": ["Corporate", "Residential", "Event", "Industrial", "Mall Security"], "required": True},
-            {"name": "training_certifications", "label": "Training Certifications", "type": "text", "required": False},
-            {"name": "shift_preference", "label": "Shift Preference", "type": "select", "options": ["Day", "Night", "Rotating", "Any"], "required": True}
-        ]
-    },
-    "Cleaner": {
-        "icon": "fas fa-broom",
-        "fields": [
-            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
-            {"name": "cleaning_types", "label": "Cleaning Types", "type": "select", "options": ["House", "Office", "Industrial", "Commercial", "Car"], "required": True},
-            {"name": "equipment", "label": "Cleaning Equipment", "type": "text", "required": False},
-            {"name": "chemicals_knowledge", "label": "Cleaning Chemicals Knowledge", "type": "select", "options": ["Basic", "Intermediate", "Expert"], "required": False},
-            {"name": "areas_covered", "label": "Areas Covered", "type": "text", "required": False}
-        ]
+# Static template text is rendered from the compiled catalogs in translations/
+app.jinja_env.add_extension(CatalogExtension)
+app.jinja_env.globals['_'] = gettext
+
+@app.context_processor
+def inject_language():
+    return {
+        'current_language': catalog_language(session.get('language', 'en')),
+        'catalog_version': catalogs.version
     }
-}
 
-# Initialize helpers
-ai_helper = AIHelper()
-job_recommender = JobRecommender()
+# Helpers are created by start_services(), not at import: TTS pool workers are
+# spawned processes that re-import this module as __mp_main__
+ai_helper = None
+job_recommender = None
 auth_helper = Auth()
+_services_started = False
+_services_lock = threading.Lock()
+
+def start_services():
+    """Model clients and background warm-ups, started once in the serving process"""
+    global ai_helper, job_recommender, _services_started
+    with _services_lock:
+        if _services_started:
+            return
+        ai_helper = AIHelper()
+        job_recommender = JobRecommender()
+        # Offline speech models are loaded once per worker, in the background
+        speech_engines.start_warm_up()
+        if Config.CATALOG_BUILD_ON_START:
+            threading.Thread(target=build_missing, name="catalog-build", daemon=True).start()
+        _services_started = True
+
+@app.before_request
+def start_on_first_request():
+    if not _services_started:
+        start_services()
 
 def get_db_connection():
     return mysql.connector.connect(
@@ -242,7 +166,7 @@ def language():
 
            return redirect(url_for('login'))
 
-    return render_template('language.html', languages=languages, selected_language=selected_language)
+    return page_cache.render('language.html', vary=(selected_language,), languages=languages, selected_language=selected_language)
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -339,7 +263,7 @@ def profession():
             'description': f"Professional {prof_name.lower()} with verified skills"
         })
     
-    return render_template('profession.html', professions=professions)
+    return page_cache.render('profession.html', professions=professions)
 
 @app.route('/verification', methods=['GET', 'POST'])
 def verification():
@@ -362,7 +286,7 @@ def verification():
         session['verification_data'] = verification_data
         return redirect(url_for('profile'))
     
-    return render_template('verification.html', profession=profession, fields=fields)
+    return page_cache.render('verification.html', vary=(profession,), profession=profession, fields=fields)
 
 @app.route('/profile', methods=['GET', 'POST'])
 def profile():
@@ -526,12 +450,30 @@ def voice_input():
 
 @app.route('/speech-to-text', methods=['POST'])
 def speech_to_text():
+    """Audio as a raw binary body (audio/*), a multipart 'audio' file, or legacy base64 JSON"""
+    language = request.args.get('lang', 'en-IN')
     try:
-        audio_data = request.json.get('audio_data')
-        if audio_data:
-            text = transcribe_audio(audio_data)
-            return jsonify({'success': True, 'text': text})
-        return jsonify({'success': False, 'error': 'No audio data'})
+        if request.is_json:
+            audio_data = request.json.get('audio_data')
+            if audio_data:
+                text = transcribe_audio(audio_data, language)
+                return jsonify({'success': True, 'text': text})
+            return jsonify({'success': False, 'error': 'No audio data'})
+
+        if request.content_length and request.content_length > Config.SPEECH_MAX_BYTES:
+            raise AudioLimitError(f"Audio larger than {Config.SPEECH_MAX_BYTES} bytes")
+        if request.mimetype == 'multipart/form-data':
+            upload = request.files.get('audio')
+            if not upload:
+                return jsonify({'success': False, 'error': 'No audio data'})
+            stream = upload.stream
+        else:
+            stream = request.stream
+        # Piped to the decoder chunk by chunk as it arrives
+        text = transcribe_stream(iter(lambda: stream.read(CHUNK_SIZE), b''), language)
+        return jsonify({'success': True, 'text': text})
+    except AudioLimitError as e:
+        return jsonify({'success': False, 'error': str(e)}), 413
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -554,6 +496,73 @@ def translate_text():
             'error': str(e)
         }), 500
 
+@app.route('/translations/<lang>')
+def translation_catalog(lang):
+    """Full compiled catalog for a language; immutable when requested with the current ?v=version"""
+    lang = catalog_language(lang)
+    response = jsonify({
+        'language': lang,
+        'version': catalogs.version,
+        'messages': catalogs.catalog(lang)
+    })
+    response.set_etag(f"{catalogs.version}-{lang}")
+    if request.args.get('v') == catalogs.version:
+        response.cache_control.public = True
+        response.cache_control.max_age = 365 * 24 * 60 * 60
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def rate_limited(bucket, limit):
+    """True once this client has made more than limit calls to bucket in the current minute (all workers)"""
+    window = int(time.time() // 60)
+    return shared_cache.increment('rate_limit', cache_key(bucket, request.remote_addr, window), 60) > limit
+
+@app.route('/translate/bulk', methods=['POST'])
+def translate_bulk():
+    """Translate all strings of a page in one request: catalog first, one batched LLM call for the rest"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('strings', []), list):
+        return jsonify({'success': False, 'error': 'Expected {"strings": [...]}'}), 400
+    strings = [s for s in data.get('strings', []) if isinstance(s, str) and s.strip()]
+    strings = list(dict.fromkeys(strings))
+    if (len(strings) > Config.TRANSLATION_BULK_MAX_STRINGS
+            or any(len(s) > Config.TRANSLATION_BULK_MAX_STRING_CHARS for s in strings)
+            or sum(len(s) for s in strings) > Config.TRANSLATION_BULK_MAX_TOTAL_CHARS):
+        return jsonify({'success': False, 'error': 'Too much text to translate'}), 413
+
+    try:
+        # Only into the language chosen for this session: without one there is nothing to translate
+        lang = catalog_language(session.get('language', 'en'))
+
+        translations = {}
+        if lang != 'en':
+            residual = []
+            for text in strings:
+                translated = catalogs.translate(text, lang)
+                if translated:
+                    translations[text] = translated
+                else:
+                    residual.append(text)
+            if residual:
+                if rate_limited('translate_bulk', Config.TRANSLATION_BULK_RATE_LIMIT):
+                    return jsonify({'success': False, 'error': 'Too many requests'}), 429, {'Retry-After': '60'}
+                translations.update(zip(residual, translator.batch_translate(residual, lang)))
+
+        # Not HTTP-cacheable (POST); the browser keeps results in localStorage per catalog version
+        return jsonify({
+            'success': True,
+            'language': lang,
+            'version': catalogs.version,
+            'translations': {text: value for text, value in translations.items() if value != text}
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/track-job', methods=['POST'])
 def track_job():
     try:
@@ -578,6 +587,33 @@ def track_job():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/metrics/llm')
+def llm_metrics_export():
+    """Expose per-call-site LLM metrics (Prometheus text, or JSON with ?format=json)
+
+    Needs `Authorization: Bearer <METRICS_TOKEN>`; without a configured token
+    the endpoint does not exist.
+    """
+    token = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    if not Config.METRICS_TOKEN:
+        abort(404)
+    if not hmac.compare_digest(token.encode(), Config.METRICS_TOKEN.encode()):
+        abort(401)
+    if request.args.get('format') == 'json':
+        return jsonify({
+            'calls': llm_metrics.snapshot(),
+            'json_parse': get_parse_stats(),
+            'translation_cache': translator.cache_stats(),
+            'shared_cache': shared_cache.stats(),
+            'page_cache': page_cache.stats(),
+            'tts': tts_pool.stats(),
+            'tts_cache': tts_cache.stats(),
+            'semantic_cache': semantic_cache.stats(),
+            'speech': speech_engines.stats(),
+            'deadline_calls': deadline_stats()
+        })
+    return app.response_class(llm_metrics.prometheus_text(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/logout')
 def logout():
     session.clear()
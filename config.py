@@ -28,6 +28,93 @@ class Config:
     # Application Settings
     DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'
     PORT = int(os.getenv('PORT', 5000))
+    ASYNC_PORT = int(os.getenv('ASYNC_PORT', 5001))  # services/async_app.py; its docstring lists the paths to route there
     
     # Session Settings
     PERMANENT_SESSION_LIFETIME = 30 * 24 * 60 * 60  # 30 days
+    
+    # LLM Backend Settings
+    LLM_BACKEND = os.getenv('LLM_BACKEND', 'gemini')  # gemini, record or replay
+    LLM_RECORDINGS_FILE = os.getenv('LLM_RECORDINGS_FILE', 'instance/llm_recordings.jsonl')
+    LLM_REPLAY_LATENCY = os.getenv('LLM_REPLAY_LATENCY', 'fixed:0')  # fixed:ms, uniform:min:max, normal:mean:sd, lognormal:median:sigma
+    LLM_REPLAY_ERROR_RATE = float(os.getenv('LLM_REPLAY_ERROR_RATE', 0))
+    LLM_REPLAY_ON_MISS = os.getenv('LLM_REPLAY_ON_MISS', 'error')  # error or cycle
+    LLM_REPLAY_SEED = int(os.getenv('LLM_REPLAY_SEED', 0))
+    
+    # LLM Metrics Settings
+    LLM_METRICS_LOG_INTERVAL = int(os.getenv('LLM_METRICS_LOG_INTERVAL', 300))  # seconds, 0 disables
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')  # bearer token for /metrics/llm; empty disables the endpoint
+    # USD per 1M tokens, keyed by model name
+    LLM_PRICING = os.getenv('LLM_PRICING', '{"gemini-2.5-flash-lite": {"input": 0.10, "output": 0.40}, "gemini-2.5-flash": {"input": 0.30, "output": 2.50}, "gemini-2.5-pro": {"input": 1.25, "output": 10.00}, "gemini-pro": {"input": 0.50, "output": 1.50}}')
+    
+    # LLM Routing Settings
+    LLM_ROUTING_ENABLED = os.getenv('LLM_ROUTING_ENABLED', 'True').lower() == 'true'
+    LLM_ROUTING_FILE = os.getenv('LLM_ROUTING_FILE', 'instance/llm_routing.json')  # re-read when modified
+    LLM_ROUTING = os.getenv('LLM_ROUTING', '')  # inline JSON overrides, takes precedence over the file
+    
+    # Translation Cache Settings
+    TRANSLATION_CACHE_LEGACY_JSON = 'instance/translation_cache.json'  # migrated into the shared cache on first use
+    TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv('TRANSLATION_MEMORY_MAX_ENTRIES', 5000))
+    TRANSLATION_MEMORY_MAX_BYTES = int(os.getenv('TRANSLATION_MEMORY_MAX_BYTES', 8 * 1024 * 1024))
+    TRANSLATION_BATCH_MAX_ITEMS = int(os.getenv('TRANSLATION_BATCH_MAX_ITEMS', 50))
+    TRANSLATION_BATCH_MAX_CHARS = int(os.getenv('TRANSLATION_BATCH_MAX_CHARS', 4000))
+    TRANSLATION_BULK_MAX_STRINGS = int(os.getenv('TRANSLATION_BULK_MAX_STRINGS', 200))  # per /translate/bulk request
+    TRANSLATION_BULK_MAX_STRING_CHARS = int(os.getenv('TRANSLATION_BULK_MAX_STRING_CHARS', 500))
+    TRANSLATION_BULK_MAX_TOTAL_CHARS = int(os.getenv('TRANSLATION_BULK_MAX_TOTAL_CHARS', 20000))
+    TRANSLATION_BULK_RATE_LIMIT = int(os.getenv('TRANSLATION_BULK_RATE_LIMIT', 30))  # LLM-backed requests per client per minute
+    
+    # Shared Cache Settings (one SQLite file used by every worker on the host)
+    SHARED_CACHE_DB = os.getenv('SHARED_CACHE_DB', 'instance/shared_cache.db')
+    SHARED_CACHE_MAX_BYTES = int(os.getenv('SHARED_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+    ENHANCE_CACHE_TTL = int(os.getenv('ENHANCE_CACHE_TTL', 30 * 24 * 60 * 60))  # seconds
+    RESUME_CACHE_TTL = int(os.getenv('RESUME_CACHE_TTL', 7 * 24 * 60 * 60))
+    RECOMMENDATIONS_CACHE_TTL = int(os.getenv('RECOMMENDATIONS_CACHE_TTL', 6 * 60 * 60))
+    
+    # Page Cache Settings
+    PAGE_CACHE_MAX_ENTRIES = int(os.getenv('PAGE_CACHE_MAX_ENTRIES', 512))
+    PAGE_CACHE_MAX_BYTES = int(os.getenv('PAGE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    DEPLOY_VERSION = os.getenv('DEPLOY_VERSION', '')  # e.g. the git SHA; part of every page cache key
+    
+    # TTS Pool Settings
+    TTS_POOL_SIZE = int(os.getenv('TTS_POOL_SIZE', 2))  # worker processes, one engine each
+    TTS_MAX_USES = int(os.getenv('TTS_MAX_USES', 50))  # syntheses before a worker is recycled
+    TTS_TIMEOUT = float(os.getenv('TTS_TIMEOUT', 30))  # seconds, including queue wait
+    TTS_QUEUE_MAX = int(os.getenv('TTS_QUEUE_MAX', 32))
+    TTS_RATE = int(os.getenv('TTS_RATE', 170))
+    TTS_CACHE_DIR = os.getenv('TTS_CACHE_DIR', 'instance/tts_cache')
+    TTS_CACHE_MAX_BYTES = int(os.getenv('TTS_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+    TTS_AUDIO_FORMAT = os.getenv('TTS_AUDIO_FORMAT', 'opus')  # opus, mp3 or wav; encoding needs pydub + ffmpeg
+    TTS_AUDIO_BITRATE = os.getenv('TTS_AUDIO_BITRATE', '24k')
+    TTS_PENDING_TTL = int(os.getenv('TTS_PENDING_TTL', 24 * 60 * 60))  # seconds an audio URL stays valid before first fetch
+    TTS_WARMUP = os.getenv('TTS_WARMUP', 'True').lower() == 'true'  # synthesize common replies at startup
+    TTS_SEGMENT_MIN_CHARS = int(os.getenv('TTS_SEGMENT_MIN_CHARS', 24))  # shorter sentences are spoken with the next one
+    
+    # Assistant Semantic Cache Settings (needs numpy)
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.92))  # cosine similarity, on top of matching content words; above 1 disables
+    SEMANTIC_CACHE_DIMENSIONS = int(os.getenv('SEMANTIC_CACHE_DIMENSIONS', 2048))
+    SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv('SEMANTIC_CACHE_MAX_ENTRIES', 1000))  # per language
+    SEMANTIC_CACHE_TTL = int(os.getenv('SEMANTIC_CACHE_TTL', 7 * 24 * 60 * 60))  # seconds an answer can be reused
+    
+    # Assistant Language Settings
+    ASSISTANT_NATIVE_LANGUAGE = os.getenv('ASSISTANT_NATIVE_LANGUAGE', 'True').lower() == 'true'  # False: translate to English and back
+    CHAT_MEMORY_TURNS = int(os.getenv('CHAT_MEMORY_TURNS', 4))  # recent turns sent verbatim; older ones are summarized
+    CHAT_SUMMARY_MAX_WORDS = int(os.getenv('CHAT_SUMMARY_MAX_WORDS', 80))
+    CHAT_MEMORY_TTL = int(os.getenv('CHAT_MEMORY_TTL', 2 * 60 * 60))  # seconds of inactivity before a conversation is forgotten
+    CHAT_DEADLINE = float(os.getenv('CHAT_DEADLINE', 20))  # seconds for translation and generation before /chat gives up
+    
+    # Speech-to-text Upload Limits (enforced while the upload streams into ffmpeg)
+    SPEECH_MAX_BYTES = int(os.getenv('SPEECH_MAX_BYTES', 5 * 1024 * 1024))
+    SPEECH_MAX_SECONDS = int(os.getenv('SPEECH_MAX_SECONDS', 60))
+    
+    # Speech-to-text Engine Settings (offline engine: requirements-optional.txt plus a downloaded model per language)
+    STT_ENGINES = os.getenv('STT_ENGINES', '{"*": "google"}')  # JSON language -> google or vosk; "*" for the rest
+    STT_VOSK_MODELS = os.getenv('STT_VOSK_MODELS', '')  # JSON language -> model directory, e.g. {"en-IN": "models/vosk-model-small-en-in-0.4"}
+    STT_MIN_CONFIDENCE = float(os.getenv('STT_MIN_CONFIDENCE', 0.75))  # below this a local result is re-checked online
+    STT_WARMUP = os.getenv('STT_WARMUP', 'True').lower() == 'true'  # load local models at startup
+    
+    # Voice inputs up to this many words are enhanced locally without an LLM call
+    LOCAL_ENHANCE_MAX_WORDS = int(os.getenv('LOCAL_ENHANCE_MAX_WORDS', 6))
+    
+    # Compiled UI string catalogs, built with `python -m utils.build_catalogs` at deploy time
+    CATALOG_DIR = os.getenv('CATALOG_DIR', 'translations')
+    CATALOG_BUILD_ON_START = os.getenv('CATALOG_BUILD_ON_START', 'True').lower() == 'true'  # build missing catalogs in the background
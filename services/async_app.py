@@ -0,0 +1,233 @@
+# services/async_app.py
+"""asyncio server for the endpoints that mostly wait on Gemini, Google Translate and speech APIs
+
+One event loop holds many slow requests at once, where a sync gunicorn worker
+holds one. Run it next to the Flask app and route these paths to it:
+
+    gunicorn services.async_app:create_app --worker-class aiohttp.GunicornWebWorker --bind 0.0.0.0:5001
+
+    POST /chat  /chat/cancel  /voice-input  /translate  /speech-to-text
+
+Everything else stays on Flask, notably:
+
+    GET  /jobs                    server-rendered page (Flask templates, login redirect);
+                                  its Gemini call is cached per profile in the shared cache
+    POST /translate/bulk          page strings, answered mostly from the compiled catalogs
+    GET  /assistant/audio/<key>   files written by the TTS pool
+
+The Flask session cookie is read (and, for a new chat, written) with the Flask
+app's own signing settings.
+"""
+import asyncio
+import time
+import uuid
+from aiohttp import web
+from flask import Flask
+from itsdangerous import BadSignature
+from config import Config
+from utils.ai_helper import AIHelper
+from utils.chat_memory import chat_memory
+from utils.deadline import DeadlineExceeded
+from utils.llm_metrics import llm_metrics
+from utils.speech_recognition import (
+    AudioLimitError, CHUNK_SIZE, decode_stream_async, recognize_pcm, transcribe_audio
+)
+from utils.stt_engines import speech_engines
+from utils.translation import translator
+from services import assistant_service as assistant
+
+# Created by create_app(), not at import: spawned TTS workers re-import the main module
+ai_helper = None
+
+# Signs session cookies exactly like app.py, so both servers share one session
+_session_app = Flask(__name__)
+_session_app.config.from_object(Config)
+_session_app.secret_key = Config.SECRET_KEY
+_session_serializer = _session_app.session_interface.get_signing_serializer(_session_app)
+
+
+def load_session(request):
+    cookie = request.cookies.get(_session_app.config['SESSION_COOKIE_NAME'])
+    if not cookie:
+        return {}
+    try:
+        return _session_serializer.loads(cookie, max_age=int(_session_app.permanent_session_lifetime.total_seconds()))
+    except BadSignature:
+        return {}
+
+
+def save_session(response, session):
+    config = _session_app.config
+    response.set_cookie(
+        config['SESSION_COOKIE_NAME'],
+        _session_serializer.dumps(dict(session)),
+        max_age=int(_session_app.permanent_session_lifetime.total_seconds()) if session.get('_permanent') else None,
+        path=config['SESSION_COOKIE_PATH'] or '/',
+        domain=config['SESSION_COOKIE_DOMAIN'] or None,
+        secure=config['SESSION_COOKIE_SECURE'],
+        httponly=config['SESSION_COOKIE_HTTPONLY'],
+        samesite=config['SESSION_COOKIE_SAMESITE']
+    )
+
+
+def audio_url(key):
+    return f"/assistant/audio/{key}"
+
+
+async def read_json(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def chat(request):
+    start_time = time.time()
+    data = await read_json(request)
+    user_text, lang, request_id = assistant.parse_chat_request(data)
+    if not user_text:
+        return web.json_response({"error": "No text provided"}, status=400)
+
+    session = load_session(request)
+    new_conversation = "chat_id" not in session
+    conversation_id = session.setdefault("chat_id", uuid.uuid4().hex)
+    # Memory, the answer cache and audio parking are SQLite and file calls: kept off the event loop
+    context = chat_memory.context(await asyncio.to_thread(chat_memory.load, conversation_id))
+
+    def respond(body, status=200):
+        response = web.json_response(body, status=status)
+        if new_conversation:
+            save_session(response, session)
+        return response
+
+    cached_reply = await asyncio.to_thread(assistant.cached_chat_reply, user_text, lang, conversation_id, context)
+    if cached_reply:
+        return respond(await asyncio.to_thread(
+            assistant.chat_payload, cached_reply, lang, data, request_id, audio_url,
+            response_time=round(time.time() - start_time, 2), cached=True
+        ))
+
+    if not assistant.gemini_model:
+        return respond({"error": "Gemini model initialization failed"}, 500)
+
+    try:
+        reply = await assistant.chat_reply_async(user_text, lang, context, assistant.chat_deadline(request_id))
+    except DeadlineExceeded as e:
+        llm_metrics.record_fallback("chat_abandoned")
+        print(f"Assistant request abandoned: {e}")
+        return respond({"error": str(e)}, 504)
+    except Exception as e:
+        llm_metrics.record_fallback("chat")
+        return respond({"error": f"Gemini API failed: {e}"}, 500)
+
+    await asyncio.to_thread(assistant.remember_reply, conversation_id, user_text, lang, context, reply)
+    return respond(await asyncio.to_thread(
+        assistant.chat_payload, reply, lang, data, request_id, audio_url,
+        response_time=round(time.time() - start_time, 2)
+    ))
+
+
+async def cancel_chat(request):
+    data = await read_json(request)
+    request_id = assistant.valid_request_id(data.get("request_id"))
+    if request_id:
+        await asyncio.to_thread(assistant.cancelled_requests.set, request_id, True)
+    return web.Response(status=204)
+
+
+async def voice_input(request):
+    try:
+        data = await read_json(request)
+        text = data.get('text', '')
+        profession = load_session(request).get('profession', '')
+        enhanced_text = await ai_helper.enhance_text_async(
+            text, data.get('field_name'), profession, max_wait=Config.CHAT_DEADLINE
+        )
+        return web.json_response({
+            'success': True,
+            'enhanced_text': enhanced_text,
+            'original_text': text
+        })
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+
+async def translate_text(request):
+    try:
+        data = await read_json(request)
+        text = data.get('text', '')
+        translated_text = await translator.translate_text_async(text, data.get('target_lang', 'en'))
+        return web.json_response({
+            'success': True,
+            'translated_text': translated_text,
+            'original_text': text
+        })
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=500)
+
+
+async def speech_to_text(request):
+    """Audio as a raw binary body (audio/*), a multipart 'audio' part, or legacy base64 JSON"""
+    language = request.query.get('lang', 'en-IN')
+    try:
+        if request.content_type == 'application/json':
+            audio_data = (await read_json(request)).get('audio_data')
+            if audio_data:
+                # The speech recognizer only has a blocking client
+                text = await asyncio.to_thread(transcribe_audio, audio_data, language)
+                return web.json_response({'success': True, 'text': text})
+            return web.json_response({'success': False, 'error': 'No audio data'})
+
+        if request.content_length and request.content_length > Config.SPEECH_MAX_BYTES:
+            raise AudioLimitError(f"Audio larger than {Config.SPEECH_MAX_BYTES} bytes")
+        chunks = request.content.iter_chunked(CHUNK_SIZE)
+        if request.content_type == 'multipart/form-data':
+            reader = await request.multipart()
+            part = await reader.next()
+            while part is not None and part.name != 'audio':
+                part = await reader.next()
+            if part is None:
+                return web.json_response({'success': False, 'error': 'No audio data'})
+            chunks = multipart_chunks(part)
+        try:
+            pcm = await decode_stream_async(chunks)
+        except AudioLimitError:
+            raise
+        except Exception as e:
+            return web.json_response({'success': True, 'text': f"Audio processing error: {e}"})
+        text = await asyncio.to_thread(recognize_pcm, pcm, language)
+        return web.json_response({'success': True, 'text': text})
+    except AudioLimitError as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=413)
+    except Exception as e:
+        return web.json_response({'success': False, 'error': str(e)})
+
+
+async def multipart_chunks(part):
+    while True:
+        chunk = await part.read_chunk(CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+async def create_app():
+    global ai_helper
+    ai_helper = AIHelper()
+    # Audio is served by the Flask app, so its TTS warm-up is left to it
+    assistant.start(warm_up_tts=False)
+    speech_engines.start_warm_up()
+    app = web.Application(client_max_size=Config.MAX_CONTENT_LENGTH)
+    app.add_routes([
+        web.post('/chat', chat),
+        web.post('/chat/cancel', cancel_chat),
+        web.post('/voice-input', voice_input),
+        web.post('/translate', translate_text),
+        web.post('/speech-to-text', speech_to_text),
+    ])
+    return app
+
+
+if __name__ == '__main__':
+    web.run_app(create_app(), host='0.0.0.0', port=Config.ASYNC_PORT)
@@ -0,0 +1,224 @@
+# services/tts_cache.py
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+from config import Config
+from services.tts_pool import tts_pool
+
+# Replies the assistant gives often enough to synthesize ahead of time
+WARMUP_PHRASES = {
+    "en": [
+        "Hello! How can I help you today?",
+        "Sorry, I could not understand that. Could you please say it again?",
+        "Sorry, something went wrong. Please try again.",
+        "You're welcome! Is there anything else I can help you with?",
+    ],
+    "hi": [
+        "नमस्ते! मैं आज आपकी कैसे मदद कर सकता हूँ?",
+        "माफ़ कीजिए, मैं समझ नहीं पाया। कृपया फिर से बोलिए।",
+        "माफ़ कीजिए, कुछ गलत हो गया। कृपया फिर से कोशिश करें।",
+    ],
+}
+
+
+# Audio format -> (file extension, MIME type)
+AUDIO_FORMATS = {
+    "opus": (".ogg", "audio/ogg"),
+    "mp3": (".mp3", "audio/mpeg"),
+    "wav": (".wav", "audio/wav"),
+}
+
+
+# Sentence ends, including the Devanagari danda; the split keeps the punctuation
+_sentence_end = re.compile(r"(?<=[.!?।॥])\s+")
+
+
+def split_sentences(text, min_chars=24):
+    """Reply text as speakable segments: sentences, with short ones merged into the next"""
+    segments = []
+    current = ""
+    for sentence in _sentence_end.split(" ".join(text.split())):
+        current = f"{current} {sentence}".strip()
+        if len(current) >= min_chars:
+            segments.append(current)
+            current = ""
+    if current:
+        if segments and len(current) < min_chars // 2:
+            segments[-1] = f"{segments[-1]} {current}"
+        else:
+            segments.append(current)
+    return segments
+
+
+def audio_key(text, lang, voice, rate, audio_format="wav", bitrate=None):
+    """Content address of a synthesis: same text, language, voice, rate and encoding give the same audio"""
+    normalized = " ".join(text.split())
+    payload = f"{normalized}\0{lang}\0{voice or ''}\0{rate}\0{audio_format}\0{bitrate or ''}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def encoder_available():
+    """pydub and an ffmpeg binary are both needed to encode"""
+    try:
+        import pydub  # noqa: F401
+    except ImportError:
+        return False
+    return bool(shutil.which("ffmpeg") or shutil.which("avconv"))
+
+
+class TTSCache:
+    """Synthesized audio files on disk, evicted least-recently-used past max_bytes
+
+    Files are written under a temporary name and renamed into place, so every
+    worker process can share the directory safely. A file's mtime is its last
+    use.
+    """
+
+    def __init__(self, directory, max_bytes, rate, audio_format="opus", bitrate="24k"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.rate = rate
+        if audio_format != "wav" and not encoder_available():
+            print("TTS encoding unavailable (needs pydub and ffmpeg), serving WAV")
+            audio_format = "wav"
+        self.audio_format = audio_format
+        self.bitrate = bitrate
+        self._total_bytes = None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def path_for(self, key, audio_format):
+        return os.path.join(self.directory, key[:2], key + AUDIO_FORMATS[audio_format][0])
+
+    @staticmethod
+    def mimetype_for(path):
+        for extension, mimetype in AUDIO_FORMATS.values():
+            if path.endswith(extension):
+                return mimetype
+        return "application/octet-stream"
+
+    def _count(self, outcome, amount=1):
+        with self._lock:
+            self._stats[outcome] += amount
+
+    def format_for(self, accepted=None):
+        """Configured format if the client can play it, else MP3 (else WAV)"""
+        if not accepted or self.audio_format in accepted or self.audio_format == "wav":
+            return self.audio_format
+        return "mp3" if "mp3" in accepted else "wav"
+
+    def key_for(self, text, lang="en", voice=None, audio_format=None):
+        audio_format = audio_format or self.audio_format
+        bitrate = self.bitrate if audio_format != "wav" else None
+        return audio_key(text, lang, voice, self.rate, audio_format, bitrate)
+
+    def cached_path(self, key):
+        """Path of the cached audio for a key (marking it used), or None
+
+        A file may be stored as WAV when its encoding failed.
+        """
+        for audio_format in AUDIO_FORMATS:
+            path = self.path_for(key, audio_format)
+            try:
+                os.utime(path)
+            except OSError:
+                continue
+            return path
+        return None
+
+    def lookup(self, text, lang="en", voice=None, audio_format=None):
+        """Cached audio path for a reply, or None"""
+        return self.cached_path(self.key_for(text, lang, voice, audio_format))
+
+    def synthesize(self, text, lang="en", voice=None, audio_format=None, should_cancel=None):
+        """Path of the audio for text, synthesizing and encoding it only on a cache miss"""
+        audio_format = audio_format or self.audio_format
+        key = self.key_for(text, lang, voice, audio_format)
+        path = self.cached_path(key)
+        if path:
+            self._count("hits")
+            return path
+        self._count("misses")
+
+        directory = os.path.dirname(self.path_for(key, audio_format))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=directory)
+        os.close(fd)
+        try:
+            bitrate = self.bitrate if audio_format != "wav" else None
+            produced = tts_pool.synthesize(
+                text, tmp_path, voice=voice, audio_format=audio_format, bitrate=bitrate, should_cancel=should_cancel
+            )
+            path = self.path_for(key, produced)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self._added(os.path.getsize(path))
+        return path
+
+    def _files(self):
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(tuple(extension for extension, _ in AUDIO_FORMATS.values())):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield stat.st_mtime, stat.st_size, path
+
+    def _added(self, size):
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._files())
+            else:
+                self._total_bytes += size
+            if self._total_bytes <= self.max_bytes:
+                return
+            # Rescan: other workers write to the same directory
+            files = sorted(self._files())
+            total = sum(size for _, size, _ in files)
+            for _, size, path in files:
+                if total <= self.max_bytes * 0.9:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                self._stats["evictions"] += 1
+            self._total_bytes = total
+
+    def warm_up(self, phrases=None):
+        """Synthesize the common replies that are not cached yet"""
+        for lang, texts in (phrases or WARMUP_PHRASES).items():
+            for text in texts:
+                try:
+                    self.synthesize(text, lang)
+                except Exception as e:
+                    print(f"TTS warm-up error: {e}")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["bytes"] = self._total_bytes
+            stats["format"] = self.audio_format
+            stats["bitrate"] = self.bitrate
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+
+
+# Global audio cache shared by all workers through the filesystem
+tts_cache = TTSCache(
+    Config.TTS_CACHE_DIR,
+    Config.TTS_CACHE_MAX_BYTES,
+    Config.TTS_RATE,
+    Config.TTS_AUDIO_FORMAT,
+    Config.TTS_AUDIO_BITRATE
+)
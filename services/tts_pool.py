@@ -0,0 +1,321 @@
+# services/tts_pool.py
+import atexit
+import collections
+import concurrent.futures
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from config import Config
+
+
+class TTSBusyError(RuntimeError):
+    """The synthesis queue is full"""
+
+
+class TTSCancelledError(RuntimeError):
+    """A queued synthesis was withdrawn before a worker started it"""
+
+
+def _encode(wav_path, path, audio_format, bitrate):
+    """Transcode the engine's WAV output to a compact mono speech format; returns the format written"""
+    if audio_format != "wav":
+        try:
+            from pydub import AudioSegment
+
+            segment = AudioSegment.from_file(wav_path).set_channels(1)
+            if audio_format == "opus":
+                segment.export(path, format="ogg", codec="libopus", bitrate=bitrate, parameters=["-application", "voip"])
+            else:
+                segment.export(path, format="mp3", bitrate=bitrate)
+            os.remove(wav_path)
+            return audio_format
+        except Exception as e:
+            print(f"TTS encode error, keeping WAV: {e}")
+    os.replace(wav_path, path)
+    return "wav"
+
+
+def _worker_main(jobs, results, rate, max_uses):
+    """Worker process: one long-lived pyttsx3 engine serving jobs until recycled
+
+    The process exits after max_uses jobs or after an engine failure; the pool
+    starts a fresh one in its place. A job that reaches the worker after its
+    deadline is skipped: the request waiting for it has already given up.
+    """
+    import pyttsx3
+
+    engine = pyttsx3.init()
+    engine.setProperty("rate", rate)
+    for _ in range(max_uses):
+        job = jobs.get()
+        if job is None:
+            break
+        job_id, text, path, voice, audio_format, bitrate, expires_at = job
+        if time.time() >= expires_at:
+            results.put(("done", job_id, "expired before a worker started it", 0.0, None))
+            continue
+        results.put(("started", job_id, os.getpid(), time.time()))
+        started = time.perf_counter()
+        wav_path = path + ".wav"
+        try:
+            if voice:
+                engine.setProperty("voice", voice)
+            engine.save_to_file(text, wav_path)
+            engine.runAndWait()
+        except Exception as e:
+            results.put(("done", job_id, f"{type(e).__name__}: {e}", time.perf_counter() - started, None))
+            break
+        synthesized = time.perf_counter()
+        produced = _encode(wav_path, path, audio_format, bitrate)
+        results.put(("done", job_id, None, synthesized - started, (produced, time.perf_counter() - synthesized)))
+    try:
+        engine.stop()
+    except Exception:
+        pass
+
+
+class TTSPool:
+    """Pre-initialized TTS engines in dedicated processes, fed from one bounded queue
+
+    Jobs wait in this process and are handed to the workers' queue only as
+    workers free up, so a queued job can still be cancelled.
+    """
+
+    def __init__(self, size, max_uses, timeout, queue_max, rate):
+        self.size = size
+        self.max_uses = max_uses
+        self.timeout = timeout
+        self.queue_max = queue_max
+        self.rate = rate
+        self._ctx = multiprocessing.get_context("spawn")
+        self._jobs = None
+        self._results = None
+        self._workers = []
+        self._futures = {}    # job_id -> (future, submitted_at, audio_format)
+        self._running = {}    # job_id -> pid
+        self._pending = collections.deque()  # jobs not handed to a worker yet
+        self._handed = set()  # job_ids in the workers' queue or running
+        self._abandoned = {}  # timed-out job_id still in the workers' queue or running -> time to kill its worker
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._started = False
+        self._stats = {
+            "submitted": 0, "completed": 0, "failed": 0, "timeouts": 0, "rejected": 0, "recycled": 0,
+            "queue_wait_total": 0.0, "queue_wait_max": 0.0, "synthesis_total": 0.0, "synthesis_max": 0.0,
+            "encode_total": 0.0, "encode_fallbacks": 0, "cancelled": 0
+        }
+
+    def _start(self):
+        """Start the worker processes and the result listener on first use"""
+        if self._started:
+            return
+        self._jobs = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        for _ in range(self.size):
+            self._spawn()
+        threading.Thread(target=self._listen, name="tts-results", daemon=True).start()
+        atexit.register(self.shutdown)
+        self._started = True
+
+    def _spawn(self):
+        process = self._ctx.Process(
+            target=_worker_main, args=(self._jobs, self._results, self.rate, self.max_uses), daemon=True
+        )
+        process.start()
+        self._workers.append(process)
+
+    def _replace_dead_workers(self):
+        with self._lock:
+            if not self._started:
+                return
+            alive = [p for p in self._workers if p.is_alive()]
+            dead = len(self._workers) - len(alive)
+            self._workers = alive
+            self._stats["recycled"] += dead
+            # Jobs that were running on a dead worker will never finish
+            pids = {p.pid for p in alive}
+            for job_id, pid in list(self._running.items()):
+                if pid not in pids:
+                    self._finish(job_id, RuntimeError("TTS worker exited during synthesis"), 0.0)
+            for _ in range(self.size - len(alive)):
+                self._spawn()
+
+    def _listen(self):
+        while True:
+            try:
+                message = self._results.get(timeout=1)
+            except queue.Empty:
+                self._kill_overdue()
+                self._replace_dead_workers()
+                continue
+            except (EOFError, OSError):
+                return
+
+            with self._lock:
+                if message[0] == "started":
+                    _, job_id, pid, started_at = message
+                    if job_id in self._abandoned:
+                        # Started just as it timed out; its worker is killed if it does not finish soon
+                        self._running[job_id] = pid
+                        self._abandoned[job_id] = time.time() + self.timeout
+                    elif job_id in self._futures:
+                        self._running[job_id] = pid
+                        wait = max(0.0, started_at - self._futures[job_id][1])
+                        self._stats["queue_wait_total"] += wait
+                        self._stats["queue_wait_max"] = max(self._stats["queue_wait_max"], wait)
+                else:
+                    _, job_id, error, seconds, encoded = message
+                    self._finish(job_id, RuntimeError(error) if error else None, seconds, encoded)
+            self._replace_dead_workers()
+
+    def _dispatch(self):
+        """Hand waiting jobs to the workers while some are idle; caller holds the lock"""
+        while self._pending and len(self._handed) < self.size:
+            job = self._pending.popleft()
+            self._handed.add(job[0])
+            self._jobs.put(job)
+
+    def _finish(self, job_id, error, seconds, encoded=None):
+        """Resolve a job's future with the audio format written; caller holds the lock"""
+        self._running.pop(job_id, None)
+        self._handed.discard(job_id)
+        self._abandoned.pop(job_id, None)
+        self._dispatch()
+        entry = self._futures.pop(job_id, None)
+        if entry is None:
+            return
+        future, _, audio_format = entry
+        if error:
+            self._stats["failed"] += 1
+            future.set_exception(error)
+        else:
+            produced, encode_seconds = encoded
+            self._stats["completed"] += 1
+            self._stats["synthesis_total"] += seconds
+            self._stats["synthesis_max"] = max(self._stats["synthesis_max"], seconds)
+            self._stats["encode_total"] += encode_seconds
+            if produced != audio_format:
+                self._stats["encode_fallbacks"] += 1
+            future.set_result(produced)
+
+    def synthesize(self, text, path, voice=None, audio_format="wav", bitrate=None, timeout=None, should_cancel=None):
+        """Write speech for text to path, blocking until done or timeout
+
+        Encoding happens in the worker process too. Returns the format actually
+        written, which is "wav" when the requested encoding was not possible.
+        While the job is still queued, a true should_cancel() withdraws it and
+        raises TTSCancelledError; a job already running is left to finish.
+        """
+        with self._lock:
+            self._start()
+            if len(self._futures) >= self.queue_max:
+                self._stats["rejected"] += 1
+                raise TTSBusyError("TTS queue is full")
+            job_id = next(self._ids)
+            future = concurrent.futures.Future()
+            self._futures[job_id] = (future, time.time(), audio_format)
+            self._stats["submitted"] += 1
+            deadline = time.time() + (timeout or self.timeout)
+            self._pending.append((job_id, text, path, voice, audio_format, bitrate, deadline))
+            self._dispatch()
+
+        while True:
+            remaining = max(0.0, deadline - time.time())
+            try:
+                return future.result(timeout=min(remaining, 0.25) if should_cancel else remaining)
+            except concurrent.futures.TimeoutError:
+                if time.time() >= deadline:
+                    self._timeout(job_id)
+                    raise
+                if should_cancel() and self.cancel(job_id):
+                    raise TTSCancelledError("TTS job cancelled")
+
+    def cancel(self, job_id):
+        """Withdraw a job no worker has started; False if it is already running or done"""
+        with self._lock:
+            for job in self._pending:
+                if job[0] == job_id:
+                    self._pending.remove(job)
+                    break
+            else:
+                return False
+            future, _, _ = self._futures.pop(job_id)
+            self._stats["cancelled"] += 1
+        future.cancel()
+        return True
+
+    def _timeout(self, job_id):
+        """Give up on a job and fail it
+
+        A job still waiting here is simply dropped. One in the workers' queue
+        cannot be taken back: it keeps its slot until the worker that receives
+        it skips it as expired, so nothing else is dispatched in its place and
+        it never runs twice. A worker stuck on a running job is killed and
+        replaced.
+        """
+        with self._lock:
+            self._stats["timeouts"] += 1
+            self._futures.pop(job_id, None)
+            if job_id not in self._handed:
+                self._pending = collections.deque(job for job in self._pending if job[0] != job_id)
+                return
+            if job_id not in self._running:
+                self._abandoned[job_id] = None
+                return
+            stuck = [p for p in self._workers if p.pid == self._running[job_id]]
+        self._kill(stuck)
+
+    def _kill_overdue(self):
+        """Kill the workers of timed-out jobs that started too late and are still running"""
+        now = time.time()
+        with self._lock:
+            pids = {
+                self._running[job_id] for job_id, kill_at in self._abandoned.items()
+                if kill_at is not None and kill_at <= now and job_id in self._running
+            }
+            stuck = [p for p in self._workers if p.pid in pids]
+        self._kill(stuck)
+
+    def _kill(self, processes):
+        """Terminate workers; the jobs they were running fail and replacements are started"""
+        for process in processes:
+            process.terminate()
+            process.join(timeout=1)
+        if processes:
+            self._replace_dead_workers()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["workers"] = sum(1 for p in self._workers if p.is_alive())
+            stats["queued"] = sum(1 for job_id in self._futures if job_id not in self._running)
+            stats["running"] = len(self._running)
+        started = stats["completed"] + stats["failed"]
+        stats["queue_wait_avg"] = round(stats["queue_wait_total"] / started, 4) if started else 0.0
+        stats["synthesis_avg"] = round(stats["synthesis_total"] / stats["completed"], 4) if stats["completed"] else 0.0
+        stats["encode_avg"] = round(stats["encode_total"] / stats["completed"], 4) if stats["completed"] else 0.0
+        return stats
+
+    def shutdown(self):
+        if not self._started:
+            return
+        self._started = False
+        for _ in self._workers:
+            self._jobs.put(None)
+        for process in self._workers:
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
+
+
+# Global pool; worker processes start on the first synthesis
+tts_pool = TTSPool(
+    Config.TTS_POOL_SIZE,
+    Config.TTS_MAX_USES,
+    Config.TTS_TIMEOUT,
+    Config.TTS_QUEUE_MAX,
+    Config.TTS_RATE
+)
@@ -2,145 +2,197 @@
 class TranslationManager {
     constructor() {
         this.currentLanguage = document.documentElement.lang || 'en';
+        this.catalogVersion = document.documentElement.dataset.catalogVersion || '0';
+        this.cache = this.loadCache();
+        this.catalogReady = this.loadCatalog();
         this.init();
     }
 
     init() {
-        this.setupLanguageSelector();
         this.setupRealTimeTranslation();
     }
 
-    setupLanguageSelector() {
-        const selector = document.getElementById('languageSelect');
-        if (selector) {
-            selector.addEventListener('change', (e) => {
-                this.changeLanguage(e.target.value);
-            });
+    get storageKey() {
+        return `translations:${this.currentLanguage}:${this.catalogVersion}`;
+    }
+
+    loadCache() {
+        // Entries are keyed by catalog version, so a rebuilt catalog invalidates them
+        try {
+            const stored = JSON.parse(localStorage.getItem(this.storageKey) || 'null');
+            if (stored) return stored;
+        } catch (error) {
+            console.error('Translation cache read error:', error);
         }
+        return { complete: false, messages: {} };
     }
 
-    async changeLanguage(languageCode) {
+    saveCache() {
         try {
-            const response = await fetch('/change-language', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/x-www-form-urlencoded',
-                },
-                body: `language=${languageCode}`
-            });
+            for (let i = localStorage.length - 1; i >= 0; i--) {
+                const key = localStorage.key(i);
+                if (key.startsWith(`translations:${this.currentLanguage}:`) && key !== this.storageKey) {
+                    localStorage.removeItem(key);
+                }
+            }
+            localStorage.setItem(this.storageKey, JSON.stringify(this.cache));
+        } catch (error) {
+            console.error('Translation cache write error:', error);
+        }
+    }
 
+    async loadCatalog() {
+        if (this.currentLanguage === 'en' || this.cache.complete) return;
+        try {
+            // Versioned URL: the browser keeps this response as immutable
+            const response = await fetch(`/translations/${this.currentLanguage}?v=${this.catalogVersion}`);
             const data = await response.json();
-            
-            if (data.success) {
-                // Show success message
-                this.showMessage(data.message, 'success');
-                
-                // Reload page to apply translations
-                setTimeout(() => {
-                    window.location.reload();
-                }, 1000);
-            } else {
-                this.showMessage('Failed to change language', 'error');
-            }
+            Object.assign(this.cache.messages, data.messages);
+            this.cache.complete = true;
+            this.saveCache();
         } catch (error) {
-            console.error('Language change error:', error);
-            this.showMessage('Error changing language', 'error');
+            console.error('Catalog load error:', error);
         }
     }
 
-    async translateText(text, targetLanguage = null) {
-        if (!targetLanguage) {
-            targetLanguage = this.currentLanguage;
+    normalize(text) {
+        return text.replace(/\s+/g, ' ').trim();
+    }
+
+    isTranslated(text) {
+        if (!this.translatedValues) {
+            this.translatedValues = new Set(Object.values(this.cache.messages));
         }
+        return this.translatedValues.has(text);
+    }
 
-        if (targetLanguage === 'en' || !text) {
-            return text;
+    async translateBatch(texts) {
+        // Returns {text: translation}; only strings missing from the local cache go to the server, in one request
+        const result = {};
+        if (this.currentLanguage === 'en') return result;
+        await this.catalogReady;
+
+        const missing = [];
+        for (const text of new Set(texts.map(t => this.normalize(t)).filter(Boolean))) {
+            if (text in this.cache.messages) {
+                result[text] = this.cache.messages[text];
+            } else if (!this.isTranslated(text) && /\p{L}/u.test(text)) {
+                missing.push(text);
+            }
         }
+        if (!missing.length) return result;
 
         try {
-            const response = await fetch('/api/translate', {
+            const response = await fetch('/translate/bulk', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
                 },
                 body: JSON.stringify({
-                    text: text,
-                    target_language: targetLanguage
+                    strings: missing,
+                    target_lang: this.currentLanguage
                 })
             });
 
             const data = await response.json();
-            
             if (data.success) {
-                return data.translated_text;
+                for (const text of missing) {
+                    // Untranslatable strings are remembered as themselves so they are not asked for again
+                    const translated = data.translations[text] || text;
+                    this.cache.messages[text] = translated;
+                    this.translatedValues.add(translated);
+                    result[text] = translated;
+                }
+                this.saveCache();
             } else {
                 console.error('Translation failed:', data.error);
-                return text;
             }
         } catch (error) {
             console.error('Translation error:', error);
-            return text;
         }
+        return result;
     }
 
-    async translateElement(element) {
-        const text = element.textContent.trim();
-        if (!text) return;
-
-        const translated = await this.translateText(text);
-        if (translated !== text) {
-            element.textContent = translated;
+    async translateText(text, targetLanguage = null) {
+        if (!text || (targetLanguage && targetLanguage !== this.currentLanguage)) {
+            return text;
         }
+        const translations = await this.translateBatch([text]);
+        return translations[this.normalize(text)] || text;
     }
 
     setupRealTimeTranslation() {
-        // Auto-translate dynamic content
+        if (this.currentLanguage === 'en') return;
+
+        // Added nodes are collected and translated together, one request per burst of mutations
+        const pendingNodes = new Set();
+        let timer = null;
         const observer = new MutationObserver((mutations) => {
             mutations.forEach((mutation) => {
-                if (mutation.type === 'childList') {
-                    mutation.addedNodes.forEach((node) => {
-                        if (node.nodeType === 1) { // Element node
-                            this.translateDynamicContent(node);
-                        }
-                    });
-                }
+                mutation.addedNodes.forEach((node) => {
+                    if (node.nodeType === 1) { // Element node
+                        pendingNodes.add(node);
+                    }
+                });
             });
+            if (pendingNodes.size && !timer) {
+                timer = setTimeout(() => {
+                    const nodes = [...pendingNodes];
+                    pendingNodes.clear();
+                    timer = null;
+                    this.translateDynamicContent(nodes);
+                }, 50);
+            }
         });
 
         observer.observe(document.body, {
             childList: true,
             subtree: true
         });
-    }
 
-    translateDynamicContent(element) {
-        // Translate elements with data-translate attribute
-        const translatableElements = element.querySelectorAll('[data-translate]');
-        translatableElements.forEach(el => {
-            this.translateElement(el);
-        });
+        this.translateDynamicContent([document.body]);
+    }
 
-        // Translate input placeholders
-        const inputs = element.querySelectorAll('input[placeholder], textarea[placeholder]');
-        inputs.forEach(input => {
-            this.translateAttribute(input, 'placeholder');
+    collectTargets(element) {
+        const targets = [];
+        const matches = (selector) => [
+            ...(element.matches(selector) ? [element] : []),
+            ...element.querySelectorAll(selector)
+        ];
+
+        // Elements with data-translate attribute and button texts; only direct text nodes so icons survive
+        matches('[data-translate], button:not([data-no-translate])').forEach(el => {
+            el.childNodes.forEach(node => {
+                if (node.nodeType === 3 && node.textContent.trim()) {
+                    targets.push({
+                        text: node.textContent,
+                        apply: (value) => { node.textContent = value; }
+                    });
+                }
+            });
         });
 
-        // Translate button texts
-        const buttons = element.querySelectorAll('button:not([data-no-translate])');
-        buttons.forEach(button => {
-            this.translateElement(button);
+        // Input placeholders
+        matches('input[placeholder], textarea[placeholder]').forEach(input => {
+            targets.push({
+                text: input.getAttribute('placeholder'),
+                apply: (value) => input.setAttribute('placeholder', value)
+            });
         });
+        return targets;
     }
 
-    async translateAttribute(element, attribute) {
-        const value = element.getAttribute(attribute);
-        if (value) {
-            const translated = await this.translateText(value);
-            if (translated !== value) {
-                element.setAttribute(attribute, translated);
+    async translateDynamicContent(elements) {
+        const targets = elements.flatMap(element => this.collectTargets(element));
+        if (!targets.length) return;
+
+        const translations = await this.translateBatch(targets.map(target => target.text));
+        targets.forEach(target => {
+            const translated = translations[this.normalize(target.text)];
+            if (translated && translated !== this.normalize(target.text)) {
+                target.apply(translated);
             }
-        }
+        });
     }
 
     showMessage(message, type) {
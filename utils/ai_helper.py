@@ -1,86 +1,153 @@
 # utils/ai_helper.py
-import google.generativeai as genai
-import json
 import re
 from config import Config
+from utils.llm_client import llm_client
+from utils.llm_metrics import llm_metrics
+from utils.llm_json import generate_json, RESUME_SECTIONS_SCHEMA
+from utils.local_enhancer import LocalEnhancer
+from utils.shared_cache import shared_cache, cache_key
 
 class AIHelper:
     def __init__(self):
         self.api_key = Config.GEMINI_API_KEY
-        if self.api_key:
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel('gemini-2.5-flash')
-        else:
-            self.model = None
+        self.model = llm_client.get_model('gemini-2.5-flash')
+        self.local_enhancer = LocalEnhancer()
+        # LLM results are shared by all workers; identical inputs are generated once
+        self.enhance_cache = shared_cache.namespace('enhance_text', Config.ENHANCE_CACHE_TTL)
+        self.summary_cache = shared_cache.namespace('professional_summary', Config.RESUME_CACHE_TTL)
+        self.sections_cache = shared_cache.namespace('resume_sections', Config.RESUME_CACHE_TTL)
 
     def enhance_text(self, text, field_name, profession):
         """Enhance user input text using AI for better professionalism"""
-        if not self.model or not text.strip():
+        local_text = self._enhance_without_llm(text, field_name, profession)
+        if local_text is not None:
+            return local_text
+
+        try:
+            return self.enhance_cache.get_or_compute(
+                self._enhance_key(text, field_name, profession),
+                lambda: self._enhance_with_llm(text, field_name, profession)
+            )
+        except Exception as e:
+            print(f"AI enhancement error: {e}")
+            llm_metrics.record_fallback('enhance_text')
             return text
 
+    async def enhance_text_async(self, text, field_name, profession, max_wait=None):
+        """enhance_text() for the asyncio app
+
+        Shares the cache and the compute-once lease with enhance_text(); waits
+        for another worker's result at most max_wait seconds.
+        """
+        local_text = self._enhance_without_llm(text, field_name, profession)
+        if local_text is not None:
+            return local_text
+
+        async def enhance_with_llm():
+            prompt = self._enhance_prompt(text, field_name, profession)
+            response = await llm_client.generate_async(self.model, prompt, 'enhance_text', input_text=text)
+            return self._clean_enhanced(response.text)
+
         try:
-            prompt = f"""
-            Enhance the following text for a {profession}'s resume. Make it more professional, clear, and impactful for employers.
-            
-            Field: {field_name}
-            Original text: "{text}"
-            
-            Requirements:
-            - Keep it concise and professional
-            - Use industry-appropriate terminology
-            - Highlight skills and achievements
-            - Make it employer-friendly
-            - Keep the meaning unchanged
-            - Return only the enhanced text, no explanations
-            
-            Enhanced text:
-            """
-            
-            response = self.model.generate_content(prompt)
-            enhanced_text = response.text.strip()
-            
-            # Clean the response
-            enhanced_text = re.sub(r'^"|"$', '', enhanced_text)
-            return enhanced_text
-            
+            return await self.enhance_cache.get_or_compute_async(
+                self._enhance_key(text, field_name, profession), enhance_with_llm, max_wait=max_wait
+            )
         except Exception as e:
             print(f"AI enhancement error: {e}")
+            llm_metrics.record_fallback('enhance_text')
+            return text
+
+    def _enhance_without_llm(self, text, field_name, profession):
+        """The enhanced text when no LLM call is needed, else None"""
+        if not text.strip():
             return text
 
+        # Short or structured answers ("5 years", "yes", a license number) never need the LLM
+        local_text = self.local_enhancer.enhance(text, field_name, profession)
+        if local_text is not None:
+            llm_metrics.record_local('enhance_text')
+            return local_text
+
+        if not self.model:
+            return text
+        return None
+
+    @staticmethod
+    def _enhance_key(text, field_name, profession):
+        return cache_key(profession, field_name, ' '.join(text.split()))
+
+    def _enhance_with_llm(self, text, field_name, profession):
+        prompt = self._enhance_prompt(text, field_name, profession)
+        response = llm_client.generate(self.model, prompt, 'enhance_text', input_text=text)
+        return self._clean_enhanced(response.text)
+
+    @staticmethod
+    def _enhance_prompt(text, field_name, profession):
+        return f"""
+        Enhance the following text for a {profession}'s resume. Make it more professional, clear, and impactful for employers.
+        
+        Field: {field_name}
+        Original text: "{text}"
+        
+        Requirements:
+        - Keep it concise and professional
+        - Use industry-appropriate terminology
+        - Highlight skills and achievements
+        - Make it employer-friendly
+        - Keep the meaning unchanged
+        - Return only the enhanced text, no explanations
+        
+        Enhanced text:
+        """
+
+    @staticmethod
+    def _clean_enhanced(response_text):
+        return re.sub(r'^"|"$', '', response_text.strip())
+
     def generate_professional_summary(self, user_data, verification_data):
         """Generate professional summary using AI"""
         if not self.model:
             return self._generate_default_summary(user_data, verification_data)
 
         try:
-            prompt = f"""
-            Create a professional summary for a {user_data.get('profession', 'professional')} with the following details:
-            - Experience: {verification_data.get('experience_years', 0)} years
-            - Specialization: {verification_data.get('specialization', 'general')}
-            - Skills: {verification_data.get('skills', 'various')}
-            - Tools: {verification_data.get('tools', 'standard equipment')}
-            
-            Requirements:
-            - Keep it 2-3 sentences
-            - Professional and confident tone
-            - Highlight key strengths
-            - Suitable for resume/CV
-            - Return only the summary text
-            
-            Professional Summary:
-            """
-            
-            response = self.model.generate_content(prompt)
-            summary = response.text.strip()
-            
-            # Clean the response
-            summary = re.sub(r'^"|"$', '', summary)
-            return summary
-            
+            return self.summary_cache.get_or_compute(
+                cache_key(user_data.get('profession'), *self._resume_inputs(verification_data)),
+                lambda: self._summary_with_llm(user_data, verification_data)
+            )
         except Exception as e:
             print(f"AI summary generation error: {e}")
+            llm_metrics.record_fallback('generate_professional_summary')
             return self._generate_default_summary(user_data, verification_data)
 
+    @staticmethod
+    def _resume_inputs(verification_data):
+        """The verification fields the resume prompts depend on, in a fixed order"""
+        return [verification_data.get(field) for field in ('experience_years', 'specialization', 'skills', 'tools', 'certifications')]
+
+    def _summary_with_llm(self, user_data, verification_data):
+        prompt = f"""
+        Create a professional summary for a {user_data.get('profession', 'professional')} with the following details:
+        - Experience: {verification_data.get('experience_years', 0)} years
+        - Specialization: {verification_data.get('specialization', 'general')}
+        - Skills: {verification_data.get('skills', 'various')}
+        - Tools: {verification_data.get('tools', 'standard equipment')}
+        
+        Requirements:
+        - Keep it 2-3 sentences
+        - Professional and confident tone
+        - Highlight key strengths
+        - Suitable for resume/CV
+        - Return only the summary text
+        
+        Professional Summary:
+        """
+        
+        response = llm_client.generate(self.model, prompt, 'generate_professional_summary')
+        summary = response.text.strip()
+        
+        # Clean the response
+        return re.sub(r'^"|"$', '', summary)
+
     def _generate_default_summary(self, user_data, verification_data):
         """Generate default professional summary"""
         profession = user_data.get('profession', 'Professional')
@@ -102,36 +169,42 @@ class AIHelper:
             return self._generate_default_sections(user_data, verification_data)
 
         try:
-            prompt = f"""
-            Create enhanced resume sections for a {user_data.get('profession', 'professional')} based on:
-            - Experience: {verification_data.get('experience_years', 0)} years
-            - Skills: {verification_data.get('skills', '')}
-            - Tools: {verification_data.get('tools', '')}
-            - Certifications: {verification_data.get('certifications', '')}
-            - Specialization: {verification_data.get('specialization', '')}
-            
-            Return a JSON with sections for:
-            - professional_summary
-            - key_skills
-            - work_experience
-            - certifications
-            
-            Format: {{"professional_summary": "", "key_skills": [], "work_experience": "", "certifications": []}}
-            """
+            sections = self.sections_cache.get_or_compute(
+                cache_key(user_data.get('profession'), *self._resume_inputs(verification_data)),
+                lambda: self._sections_with_llm(user_data, verification_data)
+            ) or {}
             
-            response = self.model.generate_content(prompt)
-            sections_text = response.text.strip()
-            
-            # Clean and parse JSON
-            sections_text = sections_text.replace('```json', '').replace('```', '').strip()
-            sections = json.loads(sections_text)
-            
-            return sections
+            # Keep whatever sections were recovered and fill the rest from defaults
+            default_sections = self._generate_default_sections(user_data, verification_data)
+            default_sections.update({key: value for key, value in sections.items() if value})
+            return default_sections
             
         except Exception as e:
             print(f"AI sections generation error: {e}")
+            llm_metrics.record_fallback('generate_resume_sections')
             return self._generate_default_sections(user_data, verification_data)
 
+    def _sections_with_llm(self, user_data, verification_data):
+        prompt = f"""
+        Create enhanced resume sections for a {user_data.get('profession', 'professional')} based on:
+        - Experience: {verification_data.get('experience_years', 0)} years
+        - Skills: {verification_data.get('skills', '')}
+        - Tools: {verification_data.get('tools', '')}
+        - Certifications: {verification_data.get('certifications', '')}
+        - Specialization: {verification_data.get('specialization', '')}
+        
+        Return a JSON with sections for:
+        - professional_summary
+        - key_skills
+        - work_experience
+        - certifications
+        
+        Format: {{"professional_summary": "", "key_skills": [], "work_experience": "", "certifications": []}}
+        """
+        
+        # Nothing recovered is not cached, so the next request tries again
+        return generate_json(self.model, prompt, RESUME_SECTIONS_SCHEMA, 'generate_resume_sections') or None
+
     def _generate_default_sections(self, user_data, verification_data):
         """Generate default resume sections"""
         profession = user_data.get('profession', 'Professional')
@@ -160,7 +233,7 @@ class AIHelper:
             Return only the enhanced description.
             """
             
-            response = self.model.generate_content(prompt)
+            response = llm_client.generate(self.model, prompt, 'enhance_job_description')
             enhanced_desc = response.text.strip()
             
             job_data['description'] = enhanced_desc
@@ -168,6 +241,7 @@ class AIHelper:
             
         except Exception as e:
             print(f"AI job enhancement error: {e}")
+            llm_metrics.record_fallback('enhance_job_description')
             return job_data
 
     def generate_cover_letter(self, user_data, job_data):
@@ -193,13 +267,14 @@ class AIHelper:
             - Express enthusiasm for the role
             """
             
-            response = self.model.generate_content(prompt)
+            response = llm_client.generate(self.model, prompt, 'generate_cover_letter')
             cover_letter = response.text.strip()
             
             return cover_letter
             
         except Exception as e:
             print(f"AI cover letter error: {e}")
+            llm_metrics.record_fallback('generate_cover_letter')
             return self._generate_default_cover_letter(user_data, job_data)
 
     def _generate_default_cover_letter(self, user_data, job_data):
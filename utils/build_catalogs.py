@@ -0,0 +1,111 @@
+# utils/build_catalogs.py
+"""Build the compiled UI string catalogs in Config.CATALOG_DIR
+
+Run at deploy time, after changing templates, phrases or professions:
+
+    python -m utils.build_catalogs [lang ...]
+
+Only strings missing from an existing catalog are sent for translation. The
+app also builds catalogs that do not exist yet when it starts (see
+build_missing), so a fresh checkout is not left English-only.
+"""
+import json
+import os
+import re
+import sys
+from datetime import datetime
+from config import Config
+from utils.i18n import catalogs, extract_messages
+from utils.memory_cache import normalize_text
+from utils.glossary import domain_terms
+from utils.professions import PROFESSIONS_CONFIG
+from utils.shared_cache import shared_cache
+from utils.translation import translator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE_DIR = os.path.join(ROOT, 'templates')
+
+_flash_pattern = re.compile(r"""flash\(\s*(['"])(.+?)\1""")
+_resume_template_pattern = re.compile(r"'name': '([^']+)', 'description': '([^']+)'")
+
+
+def collect_messages():
+    """All msgids: template text, common phrases, profession labels/options and flash messages"""
+    messages = []
+
+    for name in sorted(os.listdir(TEMPLATE_DIR)):
+        if name.endswith('.html'):
+            with open(os.path.join(TEMPLATE_DIR, name), 'r', encoding='utf-8') as f:
+                messages.extend(extract_messages(f.read()))
+
+    # Also the glossary vocabulary used by translator.glossary
+    messages.extend(domain_terms(translator.common_phrases['en'].values()))
+    messages.extend(f"Professional {profession.lower()} with verified skills" for profession in PROFESSIONS_CONFIG)
+
+    with open(os.path.join(ROOT, 'app.py'), 'r', encoding='utf-8') as f:
+        source = f.read()
+    messages.extend(match.group(2) for match in _flash_pattern.finditer(source))
+    for match in _resume_template_pattern.finditer(source):
+        messages.extend(match.groups())
+
+    seen = set()
+    unique = []
+    for message in messages:
+        message = normalize_text(message)
+        if message and message not in seen:
+            seen.add(message)
+            unique.append(message)
+    return unique
+
+
+def build_catalog(language, messages):
+    """Translate the messages missing from a language's catalog and write it out"""
+    existing = dict(catalogs.catalog(language))
+    missing = [m for m in messages if m not in existing]
+    if missing:
+        translations = translator.batch_translate(missing, language, priority='batch')
+        for message, translated in zip(missing, translations):
+            if translated and normalize_text(translated) != message:
+                existing[message] = translated
+
+    compiled = {m: existing[m] for m in messages if m in existing}
+    path = catalogs.path(language)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'language': language,
+            'built_at': datetime.now().isoformat(timespec='seconds'),
+            'messages': compiled
+        }, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+    return len(compiled), len(missing)
+
+
+def main(languages=None):
+    messages = collect_messages()
+    languages = languages or [code for code in translator.language_codes if code != 'en']
+    print(f"{len(messages)} messages in {Config.CATALOG_DIR}")
+    for language in languages:
+        compiled, translated = build_catalog(language, messages)
+        print(f"  {language}: {compiled} entries ({translated} sent for translation)")
+
+
+def build_missing():
+    """Build the catalogs that do not exist yet, in one worker; the others pick the files up when written"""
+    def missing():
+        return [code for code in translator.language_codes if code != 'en' and not os.path.exists(catalogs.path(code))]
+
+    if not missing():
+        return
+    try:
+        with shared_cache.lease('catalogs', 'build', seconds=30 * 60, wait=False) as held:
+            languages = missing() if held else []
+            if languages:
+                main(languages)
+    except Exception as e:
+        print(f"Catalog build error: {e}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,11 @@
+# utils/cache_store.py
+import sqlite3
+
+
+def open_connection(path):
+    """Autocommit SQLite connection in WAL mode, safe to share between worker processes"""
+    conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
@@ -0,0 +1,86 @@
+# utils/chat_memory.py
+from config import Config
+from utils.shared_cache import shared_cache
+
+
+class ChatMemory:
+    """Per-conversation assistant context of bounded size
+
+    The last few turns are kept verbatim; older turns are folded into a rolling
+    summary, so the prompt stays roughly the same length however long the
+    conversation runs. State lives in the shared cache so any worker can serve
+    the next message; every read-modify-write holds the conversation's lease.
+    """
+
+    # Multiple of keep_turns held verbatim at most, whatever happens to the summary
+    MAX_UNSUMMARIZED = 3
+
+    def __init__(self, store, keep_turns, summary_max_words):
+        self.store = store
+        self.keep_turns = keep_turns
+        self.summary_max_words = summary_max_words
+
+    def load(self, conversation_id):
+        # first_turn numbers turns[0]; turn ids survive trimming and folding
+        return self.store.get(conversation_id) or {'summary': '', 'turns': [], 'first_turn': 0}
+
+    def context(self, memory):
+        """Prompt text for a conversation's summary and recent turns; empty for a new conversation"""
+        lines = []
+        if memory['summary']:
+            lines.append(f"Summary of the earlier conversation: {memory['summary']}")
+        for user_text, reply in memory['turns']:
+            lines.append(f"User: {user_text}")
+            lines.append(f"Assistant: {reply}")
+        return "\n".join(lines)
+
+    def append(self, conversation_id, user_text, reply):
+        """Record a turn; returns True when older turns are due to be folded into the summary"""
+        with self.store.lease(conversation_id):
+            memory = self.load(conversation_id)
+            memory['turns'].append([user_text, reply])
+            # Bound the prompt even while summarization keeps failing
+            trimmed = max(len(memory['turns']) - self.MAX_UNSUMMARIZED * max(self.keep_turns, 1), 0)
+            memory['turns'] = memory['turns'][trimmed:]
+            memory['first_turn'] = memory.get('first_turn', 0) + trimmed
+            self.store.set(conversation_id, memory)
+        return len(memory['turns']) > self.keep_turns
+
+    def fold(self, conversation_id, summarize):
+        """Fold the turns beyond the last keep_turns into the summary
+
+        summarize(summary, turns_text, max_words) returns the new summary. Turns
+        are dropped only once it succeeds, so a failed call is retried on the
+        next fold.
+        """
+        memory = self.load(conversation_id)
+        overflow = memory['turns'][:-self.keep_turns] if self.keep_turns else memory['turns']
+        if not overflow:
+            return
+        turns_text = "\n".join(f"User: {u}\nAssistant: {r}" for u, r in overflow)
+        summary = summarize(memory['summary'], turns_text, self.summary_max_words)
+        if not summary:
+            return
+        # Hard cap in case the model ignores the word limit
+        summary = " ".join(summary.split()[:self.summary_max_words * 2])
+
+        # Turn ids the summary covers; turns may have been appended or trimmed meanwhile
+        folded_up_to = memory.get('first_turn', 0) + len(overflow)
+        with self.store.lease(conversation_id):
+            memory = self.load(conversation_id)
+            first_turn = memory.get('first_turn', 0)
+            memory['summary'] = summary
+            memory['turns'] = memory['turns'][max(folded_up_to - first_turn, 0):]
+            memory['first_turn'] = max(first_turn, folded_up_to)
+            self.store.set(conversation_id, memory)
+
+    def clear(self, conversation_id):
+        self.store.delete(conversation_id)
+
+
+# Global assistant conversation memory
+chat_memory = ChatMemory(
+    shared_cache.namespace('chat_memory', Config.CHAT_MEMORY_TTL),
+    Config.CHAT_MEMORY_TURNS,
+    Config.CHAT_SUMMARY_MAX_WORDS
+)
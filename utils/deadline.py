@@ -0,0 +1,114 @@
+# utils/deadline.py
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+
+# Blocking calls without a timeout of their own each run on a thread of their
+# own: an abandoned call can take minutes to return, and in a shared pool a
+# burst of those would leave later requests queued past their deadlines
+_lock = threading.Lock()
+_calls = {'running': 0, 'abandoned': 0, 'abandoned_total': 0}
+
+
+def _start(fn, args, kwargs):
+    """Future of fn(*args, **kwargs) running on a new daemon thread, plus its abandon flag"""
+    future = concurrent.futures.Future()
+    state = {'abandoned': False}
+
+    def target():
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with _lock:
+                _calls['running'] -= 1
+                if state['abandoned']:
+                    _calls['abandoned'] -= 1
+
+    with _lock:
+        _calls['running'] += 1
+    threading.Thread(target=target, name="deadline", daemon=True).start()
+    return future, state
+
+
+def _abandon(future, state):
+    with _lock:
+        if not future.done():
+            state['abandoned'] = True
+            _calls['abandoned'] += 1
+            _calls['abandoned_total'] += 1
+
+
+def stats():
+    """Blocking calls running now, how many of them no request waits for any more, and the total abandoned"""
+    with _lock:
+        return dict(_calls)
+
+
+class DeadlineExceeded(Exception):
+    """A request ran out of time or was cancelled by its client"""
+
+
+class Deadline:
+    """Time budget of one request, checked by each stage of its pipeline
+
+    `cancelled` is an optional callable telling whether the client has given up.
+    """
+
+    POLL_INTERVAL = 0.25  # seconds between cancellation checks while waiting
+
+    def __init__(self, seconds, cancelled=None):
+        self.expires_at = time.time() + seconds
+        self.cancelled = cancelled or (lambda: False)
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.time())
+
+    def check(self, stage):
+        if self.cancelled():
+            raise DeadlineExceeded(f"Request cancelled before {stage}")
+        if not self.remaining():
+            raise DeadlineExceeded(f"Request deadline exceeded before {stage}")
+
+    def run(self, stage, fn, *args, **kwargs):
+        """fn(*args, **kwargs), abandoned when the deadline passes or the request is cancelled
+
+        An abandoned call keeps running on its thread, but the request stops
+        waiting for it; stats() counts those still running.
+        """
+        self.check(stage)
+        future, state = _start(fn, args, kwargs)
+        while True:
+            try:
+                return future.result(timeout=min(self.POLL_INTERVAL, self.remaining()))
+            except concurrent.futures.TimeoutError:
+                if self.cancelled():
+                    _abandon(future, state)
+                    raise DeadlineExceeded(f"Request cancelled during {stage}")
+                if not self.remaining():
+                    _abandon(future, state)
+                    raise DeadlineExceeded(f"Request deadline exceeded during {stage}")
+
+    async def run_async(self, stage, coroutine):
+        """Await a coroutine, cancelling it when the deadline passes or the request is cancelled"""
+        # cancelled() may read a shared store, so it is called on a thread
+        try:
+            await asyncio.to_thread(self.check, stage)
+        except DeadlineExceeded:
+            coroutine.close()  # never started
+            raise
+        task = asyncio.ensure_future(coroutine)
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=min(self.POLL_INTERVAL, self.remaining()))
+            if done:
+                return task.result()
+            if await asyncio.to_thread(self.cancelled):
+                task.cancel()
+                raise DeadlineExceeded(f"Request cancelled during {stage}")
+            if not self.remaining():
+                task.cancel()
+                raise DeadlineExceeded(f"Request deadline exceeded during {stage}")
@@ -0,0 +1,94 @@
+# utils/glossary.py
+import re
+import threading
+from utils.memory_cache import normalize_text
+from utils.professions import PROFESSIONS_CONFIG
+
+_token_pattern = re.compile(r'\w+', re.UNICODE)
+
+
+def domain_terms(phrases=()):
+    """Closed vocabulary: given phrases plus profession names, field labels and select options"""
+    terms = list(phrases)
+    for profession, config in PROFESSIONS_CONFIG.items():
+        terms.append(profession)
+        for field in config.get('fields', []):
+            terms.append(field['label'])
+            terms.extend(field.get('options', []))
+    return list(dict.fromkeys(normalize_text(term) for term in terms if term))
+
+
+class Glossary:
+    """In-process translations of the domain vocabulary, taken from the compiled catalogs
+
+    Terms are stored in a word-level trie per language, so a string made only of
+    known terms (e.g. "PVC, CPVC, GI Pipe") is translated by longest phrase match
+    without an LLM call. For other text, matches() gives the term translations
+    to pin in the LLM prompt.
+    """
+
+    def __init__(self, terms, catalogs):
+        self.terms = terms
+        self.catalogs = catalogs
+        self._tries = {}
+        self._lock = threading.Lock()
+
+    def _trie(self, language):
+        with self._lock:
+            if language not in self._tries:
+                root = {}
+                for term in self.terms:
+                    translation = self.catalogs.translate(term, language)
+                    tokens = [token.lower() for token in _token_pattern.findall(term)]
+                    if not translation or not tokens:
+                        continue
+                    node = root
+                    for token in tokens:
+                        node = node.setdefault(token, {})
+                    node[None] = translation
+                self._tries[language] = root
+            return self._tries[language]
+
+    def _scan(self, text, language):
+        """Yield (start, end, translation) for the longest glossary phrase at each position"""
+        trie = self._trie(language)
+        if not trie:
+            return
+        tokens = list(_token_pattern.finditer(text))
+        i = 0
+        while i < len(tokens):
+            node = trie
+            match = None
+            j = i
+            while j < len(tokens) and tokens[j].group().lower() in node:
+                node = node[tokens[j].group().lower()]
+                j += 1
+                if None in node:
+                    match = (j, node[None])
+            if match:
+                end, translation = match
+                yield tokens[i].start(), tokens[end - 1].end(), translation
+                i = end
+            else:
+                i += 1
+
+    def translate(self, text, language):
+        """Full translation when text is only glossary terms and punctuation, else None"""
+        if not text or not text.strip():
+            return None
+        pieces = []
+        last = 0
+        for start, end, translation in self._scan(text, language):
+            if any(ch.isalpha() for ch in text[last:start]):
+                return None
+            pieces.append(text[last:start])
+            pieces.append(translation)
+            last = end
+        if not pieces or any(ch.isalpha() for ch in text[last:]):
+            return None
+        pieces.append(text[last:])
+        return ''.join(pieces)
+
+    def matches(self, text, language):
+        """{term: translation} for glossary phrases found in text"""
+        return {text[start:end]: translation for start, end, translation in self._scan(text, language)}
@@ -0,0 +1,268 @@
+# utils/i18n.py
+import hashlib
+import html
+import json
+import os
+import re
+import threading
+import time
+from flask import has_request_context, session
+from jinja2 import Environment
+from jinja2.ext import Extension
+from jinja2.lexer import Token
+from config import Config
+from utils.memory_cache import normalize_text
+
+# Codes used by the /language page that differ from the translator's codes
+LANGUAGE_ALIASES = {'od': 'or'}
+
+# Attributes whose static values are user-visible text
+TRANSLATABLE_ATTRIBUTES = ('placeholder', 'title', 'alt', 'aria-label')
+
+_tag_pattern = re.compile(r'<(/?)([a-zA-Z][a-zA-Z0-9-]*)')
+_attribute_pattern = re.compile(r'\b(' + '|'.join(TRANSLATABLE_ATTRIBUTES) + r')="([^"{}<>]*)"')
+
+
+def catalog_language(language):
+    """Translator language code for a session language code"""
+    return LANGUAGE_ALIASES.get(language, language)
+
+
+def is_translatable(text):
+    """Whether a piece of template text carries words worth translating"""
+    return any(ch.isalpha() for ch in html.unescape(text))
+
+
+class HTMLTextScanner:
+    """Splits template data into raw markup and translatable text
+
+    State is kept across calls because Jinja splits a template into many data
+    chunks around {{ }} and {% %} tags, and a chunk may start inside a tag, a
+    comment or a <script>/<style> block.
+    """
+
+    def __init__(self):
+        self.in_tag = False
+        self.quote = None
+        self.in_comment = False
+        self.tag_name = ''
+        self.raw_until = None
+
+    def split(self, data):
+        """Yield (kind, value) pairs; kind is 'raw' or 'text'"""
+        pos = 0
+        while pos < len(data):
+            if self.raw_until:
+                end = data.lower().find(self.raw_until, pos)
+                if end == -1:
+                    yield 'raw', data[pos:]
+                    return
+                yield 'raw', data[pos:end]
+                self.raw_until = None
+                pos = end
+                continue
+
+            if self.in_comment:
+                end = data.find('-->', pos)
+                if end == -1:
+                    yield 'raw', data[pos:]
+                    return
+                yield 'raw', data[pos:end + 3]
+                self.in_comment = False
+                pos = end + 3
+                continue
+
+            if self.in_tag:
+                end = self._tag_end(data, pos)
+                yield from self._split_attributes(data[pos:end])
+                pos = end
+                continue
+
+            start = data.find('<', pos)
+            text = data[pos:] if start == -1 else data[pos:start]
+            if text:
+                yield from self._split_text(text)
+            if start == -1:
+                return
+
+            if data.startswith('<!--', start):
+                self.in_comment = True
+                pos = start
+                continue
+
+            match = _tag_pattern.match(data, start)
+            self.tag_name = ('/' if match and match.group(1) else '') + (match.group(2).lower() if match else '')
+            self.in_tag = True
+            pos = start
+
+    def _tag_end(self, data, pos):
+        """Advance through a tag, returning the index just past '>' (or the chunk end)"""
+        while pos < len(data):
+            ch = data[pos]
+            if self.quote:
+                if ch == self.quote:
+                    self.quote = None
+            elif ch in '"\'':
+                self.quote = ch
+            elif ch == '>':
+                self.in_tag = False
+                if self.tag_name in ('script', 'style'):
+                    self.raw_until = f'</{self.tag_name}'
+                return pos + 1
+            pos += 1
+        return pos
+
+    def _split_attributes(self, markup):
+        last = 0
+        for match in _attribute_pattern.finditer(markup):
+            if not is_translatable(match.group(2)):
+                continue
+            yield 'raw', markup[last:match.start(2)]
+            yield 'text', match.group(2)
+            last = match.end(2)
+        yield 'raw', markup[last:]
+
+    def _split_text(self, text):
+        core = text.strip()
+        if not core or not is_translatable(core):
+            yield 'raw', text
+            return
+        start = text.index(core)
+        if start:
+            yield 'raw', text[:start]
+        yield 'text', core
+        if start + len(core) < len(text):
+            yield 'raw', text[start + len(core):]
+
+
+def extract_messages(source):
+    """Return the normalized msgids found in a template's static text"""
+    scanner = HTMLTextScanner()
+    messages = []
+    for _, token_type, value in Environment().lex(source):
+        if token_type == 'data':
+            for kind, piece in scanner.split(value):
+                if kind == 'text':
+                    messages.append(normalize_text(html.unescape(piece)))
+    return messages
+
+
+class CatalogExtension(Extension):
+    """Rewrites static template text into _() catalog lookups at compile time
+
+    Templates are compiled once, so rendering a page costs one dict lookup per
+    string and never a translation call.
+    """
+
+    def filter_stream(self, stream):
+        if not (stream.name or '').endswith('.html'):
+            yield from stream
+            return
+
+        scanner = HTMLTextScanner()
+        for token in stream:
+            if token.type != 'data':
+                yield token
+                continue
+            for kind, value in scanner.split(token.value):
+                if kind == 'raw':
+                    if value:
+                        yield Token(token.lineno, 'data', value)
+                else:
+                    yield Token(token.lineno, 'variable_begin', '{{')
+                    yield Token(token.lineno, 'name', '_')
+                    yield Token(token.lineno, 'lparen', '(')
+                    yield Token(token.lineno, 'string', html.unescape(value))
+                    yield Token(token.lineno, 'rparen', ')')
+                    yield Token(token.lineno, 'variable_end', '}}')
+
+
+class CatalogStore:
+    """Compiled per-language catalogs produced by utils/build_catalogs.py
+
+    The files are re-checked every few seconds, so a rebuild reaches every
+    worker (and the version, page cache keys and ETags) without a restart.
+    """
+
+    CHECK_INTERVAL = 5  # seconds between checks of the catalog files
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._catalogs = {}
+        self._version = None
+        self._files = None
+        self._checked_at = 0
+        self._lock = threading.Lock()
+
+    def path(self, language):
+        return os.path.join(self.directory, f"{catalog_language(language)}.json")
+
+    def _check_files(self):
+        """Forget loaded catalogs and the version once any catalog file has changed; caller holds the lock"""
+        now = time.time()
+        if now - self._checked_at < self.CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        try:
+            files = sorted(
+                (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+                for entry in os.scandir(self.directory) if entry.name.endswith('.json')
+            )
+        except FileNotFoundError:
+            files = []
+        if files != self._files:
+            self._files = files
+            self._catalogs = {}
+            self._version = None
+
+    def catalog(self, language):
+        """msgid -> msgstr for a language, loaded once per catalog build"""
+        language = catalog_language(language)
+        with self._lock:
+            self._check_files()
+            if language not in self._catalogs:
+                messages = {}
+                path = self.path(language)
+                if os.path.exists(path):
+                    try:
+                        with open(path, 'r', encoding='utf-8') as f:
+                            messages = json.load(f).get('messages', {})
+                    except Exception as e:
+                        print(f"Catalog load error for {language}: {e}")
+                self._catalogs[language] = messages
+            return self._catalogs[language]
+
+    def translate(self, text, language):
+        """Catalog translation of text, or None when it is not in the catalog"""
+        if not text or catalog_language(language) == 'en':
+            return None
+        return self.catalog(language).get(normalize_text(text))
+
+    @property
+    def version(self):
+        """Short hash over all catalog files; changes whenever any catalog is rebuilt"""
+        with self._lock:
+            self._check_files()
+            if self._version is None:
+                digest = hashlib.sha1()
+                for name, _, _ in self._files:
+                    try:
+                        with open(os.path.join(self.directory, name), 'rb') as f:
+                            digest.update(name.encode('utf-8'))
+                            digest.update(f.read())
+                    except FileNotFoundError:
+                        self._checked_at = 0  # replaced while reading; look again next time
+                self._version = digest.hexdigest()[:12]
+            return self._version
+
+
+# Global catalog store
+catalogs = CatalogStore(Config.CATALOG_DIR)
+
+
+def gettext(text):
+    """Template `_()`: translate text into the session language from the catalogs"""
+    if not isinstance(text, str):
+        return text
+    language = session.get('language', 'en') if has_request_context() else 'en'
+    return catalogs.translate(text, language) or text
@@ -1,17 +1,17 @@
 # utils/job_recommender.py
-import google.generativeai as genai
 import json
 import random
 from config import Config
+from utils.llm_client import llm_client
+from utils.llm_metrics import llm_metrics
+from utils.llm_json import generate_json, JOB_LIST_SCHEMA
+from utils.shared_cache import shared_cache, cache_key
 
 class JobRecommender:
     def __init__(self):
         self.api_key = Config.GEMINI_API_KEY
-        if self.api_key:
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel('gemini-2.5-flash')
-        else:
-            self.model = None
+        self.model = llm_client.get_model('gemini-2.5-flash')
+        self.recommendations_cache = shared_cache.namespace('recommendations', Config.RECOMMENDATIONS_CACHE_TTL)
         
         # Base job data for fallback
         self.base_jobs = {
@@ -53,44 +53,49 @@ class JobRecommender:
             return self.get_base_recommendations(profession, experience)
         
         try:
-            prompt = f"""
-            Generate 5 realistic job recommendations for a {profession} in India with the following details:
-            - Experience: {experience} years
-            - Skills: {skills}
-            - Preferred Location: {location}
-            
-            For each job, provide:
-            1. Job title (relevant to {profession})
-            2. Company name (realistic Indian company)
-            3. Location (Indian city)
-            4. Job description (2-3 lines)
-            5. Salary range (realistic for Indian market in INR)
-            6. Required experience
-            7. Key skills required
-            8. Match score (85-98)
-            
-            Return only a JSON array without any other text.
-            Format: [{{"title": "", "company": "", "location": "", "description": "", "salary": "", "experience": "", "skills": [], "match_score": 0}}]
-            """
-            
-            response = self.model.generate_content(prompt)
-            jobs_text = response.text.strip()
-            
-            # Clean the response and parse JSON
-            jobs_text = jobs_text.replace('```json', '').replace('```', '').strip()
-            jobs = json.loads(jobs_text)
-            
-            # Add additional fields for frontend
-            for job in jobs:
-                job['source'] = 'AI Recommended'
-                job['apply_url'] = '#'
-                job['id'] = f"job_{random.randint(1000, 9999)}"
-            
-            return jobs
+            # Same profile, same recommendations for every worker until the TTL expires
+            jobs = self.recommendations_cache.get_or_compute(
+                cache_key(profession, experience, skills, location),
+                lambda: self._recommendations_with_llm(profession, experience, skills, location)
+            )
+            return jobs or self.get_base_recommendations(profession, experience)
             
         except Exception as e:
             print(f"AI job recommendation error: {e}")
+            llm_metrics.record_fallback('get_recommendations')
             return self.get_base_recommendations(profession, experience)
+
+    def _recommendations_with_llm(self, profession, experience, skills, location):
+        prompt = f"""
+        Generate 5 realistic job recommendations for a {profession} in India with the following details:
+        - Experience: {experience} years
+        - Skills: {skills}
+        - Preferred Location: {location}
+        
+        For each job, provide:
+        1. Job title (relevant to {profession})
+        2. Company name (realistic Indian company)
+        3. Location (Indian city)
+        4. Job description (2-3 lines)
+        5. Salary range (realistic for Indian market in INR)
+        6. Required experience
+        7. Key skills required
+        8. Match score (85-98)
+        
+        Return only a JSON array without any other text.
+        Format: [{{"title": "", "company": "", "location": "", "description": "", "salary": "", "experience": "", "skills": [], "match_score": 0}}]
+        """
+        
+        # Schema-constrained JSON; partial arrays are salvaged rather than discarded
+        jobs = generate_json(self.model, prompt, JOB_LIST_SCHEMA, 'get_recommendations')
+        
+        # Add additional fields for frontend
+        for job in jobs:
+            job['source'] = 'AI Recommended'
+            job['apply_url'] = '#'
+            job['id'] = f"job_{random.randint(1000, 9999)}"
+        
+        return jobs or None
     
     def get_base_recommendations(self, profession, experience):
         """Get base job recommendations when AI fails"""
@@ -158,7 +163,7 @@ class JobRecommender:
                 Return only the enhanced description.
                 """
                 
-                response = self.model.generate_content(prompt)
+                response = llm_client.generate(self.model, prompt, 'enhance_job_descriptions')
                 enhanced_desc = response.text.strip()
                 
                 job['description'] = enhanced_desc
@@ -168,6 +173,7 @@ class JobRecommender:
             
         except Exception as e:
             print(f"Job description enhancement error: {e}")
+            llm_metrics.record_fallback('enhance_job_descriptions')
             return jobs
 
     def calculate_match_score(self, job_requirements, user_profile):
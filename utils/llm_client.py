@@ -0,0 +1,301 @@
+# utils/llm_client.py
+import google.generativeai as genai
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from config import Config
+from utils.llm_metrics import llm_metrics, estimate_tokens, response_token_counts
+from utils.llm_router import llm_router
+
+
+class LLMInjectedError(Exception):
+    """Raised by the replay backend to simulate an upstream API failure"""
+
+
+class LLMReplayMiss(Exception):
+    """Raised by the replay backend when no recording matches a prompt"""
+
+
+class StandInResponse:
+    """Minimal response object exposing the `.text` attribute call sites use"""
+
+    def __init__(self, text):
+        self.text = text
+
+
+def recording_key(model_name, prompt):
+    """Stable key for a prompt sent to a given model"""
+    normalized = ' '.join(str(prompt).split())
+    return hashlib.sha256(f"{model_name}\n{normalized}".encode('utf-8')).hexdigest()
+
+
+def model_label(model):
+    """Short model name used in metrics, e.g. 'gemini-2.5-flash'"""
+    name = getattr(model, 'model_name', None) or 'unknown'
+    return name.split('/', 1)[1] if name.startswith('models/') else name
+
+
+def parse_latency_spec(spec):
+    """Parse a latency spec like 'uniform:50:400' into a sampler returning seconds"""
+    parts = (spec or 'fixed:0').split(':')
+    kind = parts[0].strip().lower()
+    params = [float(p) for p in parts[1:]]
+
+    if kind == 'fixed':
+        value = params[0] if params else 0.0
+        return lambda rng: value / 1000.0
+    if kind == 'uniform':
+        low, high = params
+        return lambda rng: rng.uniform(low, high) / 1000.0
+    if kind == 'normal':
+        mean, stddev = params
+        return lambda rng: max(0.0, rng.gauss(mean, stddev)) / 1000.0
+    if kind == 'lognormal':
+        # median in ms, sigma of the underlying normal distribution
+        median, sigma = params
+        return lambda rng: median * rng.lognormvariate(0, sigma) / 1000.0
+
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class RecordingModel:
+    """Wraps a real model and appends every prompt/response pair to disk"""
+
+    _lock = threading.Lock()
+
+    def __init__(self, model, model_name, recordings_file):
+        self.model = model
+        self.model_name = model_name
+        self.recordings_file = recordings_file
+
+    def generate_content(self, prompt, **kwargs):
+        started = time.time()
+        response = self.model.generate_content(prompt, **kwargs)
+        elapsed_ms = round((time.time() - started) * 1000, 1)
+
+        self._append({
+            'key': recording_key(self.model_name, prompt),
+            'model': self.model_name,
+            'prompt': prompt,
+            'text': response.text,
+            'latency_ms': elapsed_ms,
+        })
+        return response
+
+    async def generate_content_async(self, prompt, **kwargs):
+        started = time.time()
+        response = await self.model.generate_content_async(prompt, **kwargs)
+        elapsed_ms = round((time.time() - started) * 1000, 1)
+
+        self._append({
+            'key': recording_key(self.model_name, prompt),
+            'model': self.model_name,
+            'prompt': prompt,
+            'text': response.text,
+            'latency_ms': elapsed_ms,
+        })
+        return response
+
+    def _append(self, record):
+        """Append one JSON line; a single write keeps lines intact across workers"""
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        directory = os.path.dirname(self.recordings_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            with self._lock, open(self.recordings_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+        except Exception as e:
+            print(f"LLM recording error: {e}")
+
+
+class ReplayModel:
+    """Serves recorded responses with simulated latency and injected errors"""
+
+    def __init__(self, model_name, recordings, latency_sampler, error_rate, on_miss, seed):
+        self.model_name = model_name
+        self.recordings = recordings
+        self.latency_sampler = latency_sampler
+        self.error_rate = error_rate
+        self.on_miss = on_miss
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _draw(self):
+        with self._lock:
+            return self.latency_sampler(self.rng), self.rng.random() < self.error_rate
+
+    def generate_content(self, prompt, **kwargs):
+        delay, fail = self._draw()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise LLMInjectedError(f"Injected failure for model {self.model_name}")
+
+        return StandInResponse(self._lookup(prompt))
+
+    async def generate_content_async(self, prompt, **kwargs):
+        delay, fail = self._draw()
+        if delay:
+            await asyncio.sleep(delay)
+        if fail:
+            raise LLMInjectedError(f"Injected failure for model {self.model_name}")
+
+        return StandInResponse(self._lookup(prompt))
+
+    def _lookup(self, prompt):
+        key = recording_key(self.model_name, prompt)
+        if key in self.recordings['by_key']:
+            return self.recordings['by_key'][key]
+
+        # Same prompt recorded against a different model
+        normalized = ' '.join(str(prompt).split())
+        if normalized in self.recordings['by_prompt']:
+            return self.recordings['by_prompt'][normalized]
+
+        ordered = self.recordings['ordered']
+        if self.on_miss == 'cycle' and ordered:
+            # Deterministic pick so identical prompts always get identical replies
+            index = int(key, 16) % len(ordered)
+            return ordered[index]
+
+        raise LLMReplayMiss(f"No recording for prompt (key {key[:12]})")
+
+
+class LLMClient:
+    """Builds model objects for the configured backend: gemini, record or replay"""
+
+    def __init__(self):
+        self.backend = Config.LLM_BACKEND.lower()
+        self.recordings_file = Config.LLM_RECORDINGS_FILE
+        self._recordings = None
+        self._replay_models = {}
+        self._routed_models = {}
+        self._lock = threading.Lock()
+
+        if self.backend in ('gemini', 'record') and Config.GEMINI_API_KEY:
+            genai.configure(api_key=Config.GEMINI_API_KEY)
+
+    @property
+    def is_available(self):
+        """Whether calls can be served at all with the current configuration"""
+        if self.backend == 'replay':
+            return True
+        return bool(Config.GEMINI_API_KEY)
+
+    def get_model(self, model_name):
+        """Return a model-like object exposing generate_content(prompt, **kwargs)"""
+        if not self.is_available:
+            return None
+
+        if self.backend == 'replay':
+            with self._lock:
+                if model_name not in self._replay_models:
+                    self._replay_models[model_name] = ReplayModel(
+                        model_name,
+                        self._load_recordings(),
+                        parse_latency_spec(Config.LLM_REPLAY_LATENCY),
+                        Config.LLM_REPLAY_ERROR_RATE,
+                        Config.LLM_REPLAY_ON_MISS,
+                        # Per-model seed keeps runs reproducible regardless of call order
+                        f"{Config.LLM_REPLAY_SEED}:{model_name}",
+                    )
+                return self._replay_models[model_name]
+
+        model = genai.GenerativeModel(model_name)
+        if self.backend == 'record':
+            return RecordingModel(model, model_name, self.recordings_file)
+        return model
+
+    def generate(self, model, prompt, call_site, input_text=None, priority='interactive', **kwargs):
+        """Run generate_content on the routed model, recording wall time and tokens for the call site
+
+        `model` is the call site's default model; the router may swap it for a faster
+        or cheaper one based on the length of `input_text` (the prompt if omitted).
+        """
+        model = self._route(model, prompt, call_site, input_text, priority)
+        name = model_label(model)
+        started = time.time()
+        try:
+            response = model.generate_content(prompt, **kwargs)
+        except Exception:
+            llm_metrics.record_call(call_site, name, time.time() - started, estimate_tokens(prompt), 0, error=True)
+            raise
+
+        prompt_tokens, response_tokens = response_token_counts(response, prompt)
+        llm_metrics.record_call(call_site, name, time.time() - started, prompt_tokens, response_tokens)
+        return response
+
+    async def generate_async(self, model, prompt, call_site, input_text=None, priority='interactive', **kwargs):
+        """generate() for the asyncio app: awaits generate_content_async where the model has it
+
+        Models without an async method run on a thread so the event loop is never blocked.
+        """
+        model = self._route(model, prompt, call_site, input_text, priority)
+        name = model_label(model)
+        started = time.time()
+        try:
+            if hasattr(model, 'generate_content_async'):
+                response = await model.generate_content_async(prompt, **kwargs)
+            else:
+                response = await asyncio.to_thread(model.generate_content, prompt, **kwargs)
+        except Exception:
+            llm_metrics.record_call(call_site, name, time.time() - started, estimate_tokens(prompt), 0, error=True)
+            raise
+
+        prompt_tokens, response_tokens = response_token_counts(response, prompt)
+        llm_metrics.record_call(call_site, name, time.time() - started, prompt_tokens, response_tokens)
+        return response
+
+    def _route(self, model, prompt, call_site, input_text, priority):
+        """The model the router picks for this call, recording the tier used"""
+        routed_name, tier = llm_router.route(
+            call_site, len(input_text if input_text is not None else prompt), model_label(model), priority
+        )
+        if routed_name != model_label(model):
+            model = self._cached_model(routed_name) or model
+        llm_metrics.record_route(call_site, tier)
+        return model
+
+    def _cached_model(self, model_name):
+        with self._lock:
+            if model_name in self._routed_models:
+                return self._routed_models[model_name]
+        model = self.get_model(model_name)
+        with self._lock:
+            self._routed_models[model_name] = model
+        return model
+
+    def _load_recordings(self):
+        """Load recordings once; later lines win for duplicate prompts"""
+        if self._recordings is not None:
+            return self._recordings
+
+        recordings = {'by_key': {}, 'by_prompt': {}, 'ordered': []}
+        if os.path.exists(self.recordings_file):
+            with open(self.recordings_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Tolerate a torn last line from an interrupted recording run
+                        continue
+                    recordings['by_key'][record['key']] = record['text']
+                    recordings['by_prompt'][' '.join(str(record['prompt']).split())] = record['text']
+                    recordings['ordered'].append(record['text'])
+        else:
+            print(f"LLM replay: recordings file {self.recordings_file} not found")
+
+        self._recordings = recordings
+        return recordings
+
+
+# Global client shared by all call sites
+llm_client = LLMClient()
@@ -0,0 +1,271 @@
+# utils/llm_json.py
+import json
+import threading
+from utils.llm_client import llm_client
+
+# Schemas use the OpenAPI subset accepted by Gemini's response_schema
+JOB_LIST_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "title": {"type": "string"},
+            "company": {"type": "string"},
+            "location": {"type": "string"},
+            "description": {"type": "string"},
+            "salary": {"type": "string"},
+            "experience": {"type": "string"},
+            "skills": {"type": "array", "items": {"type": "string"}},
+            "match_score": {"type": "integer"}
+        },
+        "required": ["title", "company", "location", "description"]
+    }
+}
+
+RESUME_SECTIONS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "professional_summary": {"type": "string"},
+        "key_skills": {"type": "array", "items": {"type": "string"}},
+        "work_experience": {"type": "string"},
+        "certifications": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": []
+}
+
+BATCH_TRANSLATION_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "id": {"type": "integer"},
+            "translation": {"type": "string"}
+        },
+        "required": ["id", "translation"]
+    }
+}
+
+_decoder = json.JSONDecoder()
+_stats_lock = threading.Lock()
+_parse_stats = {}
+
+# Older google-generativeai releases reject response_mime_type/response_schema;
+# once seen we stop sending them and rely on the prompt plus salvage parsing.
+_structured_output_supported = True
+
+
+class LLMJSONError(Exception):
+    """Raised when nothing usable could be recovered from an LLM response"""
+
+
+class SchemaError(ValueError):
+    """Raised when a value does not match its schema"""
+
+
+def _count(call_site, outcome, amount=1):
+    with _stats_lock:
+        site = _parse_stats.setdefault(call_site, {'ok': 0, 'salvaged': 0, 'failed': 0, 'dropped_items': 0})
+        site[outcome] += amount
+
+
+def get_parse_stats():
+    """Return a copy of per-call-site JSON parse counters"""
+    with _stats_lock:
+        return {site: dict(counts) for site, counts in _parse_stats.items()}
+
+
+def json_generation_config(schema):
+    """Generation config requesting schema-constrained JSON output"""
+    return {'response_mime_type': 'application/json', 'response_schema': schema}
+
+
+def generate_json(model, prompt, schema, call_site, **kwargs):
+    """Call the model in JSON mode and return a schema-validated value"""
+    global _structured_output_supported
+
+    response = None
+    if _structured_output_supported:
+        try:
+            response = llm_client.generate(model, prompt, call_site, generation_config=json_generation_config(schema), **kwargs)
+        except (TypeError, ValueError, KeyError) as e:
+            if 'response_' not in str(e):
+                raise
+            print(f"Structured JSON output not supported by client, using prompt-only JSON: {e}")
+            _structured_output_supported = False
+
+    if response is None:
+        response = llm_client.generate(model, prompt, call_site, **kwargs)
+
+    return parse_json_response(response.text, schema, call_site)
+
+
+def parse_json_response(text, schema, call_site):
+    """Parse, repair and validate model output against a schema"""
+    text = _strip_fences(text or '')
+    salvaged = False
+
+    try:
+        value = json.loads(text)
+    except ValueError:
+        value = _salvage(text, schema.get('type'))
+        salvaged = True
+        if value is None:
+            _count(call_site, 'failed')
+            raise LLMJSONError(f"Unparseable JSON from {call_site}: {text[:80]!r}")
+
+    try:
+        if schema.get('type') == 'array':
+            value, dropped = _validate_array_items(value, schema)
+            if dropped:
+                _count(call_site, 'dropped_items', dropped)
+                salvaged = True
+            if not value:
+                raise SchemaError("no valid items")
+        else:
+            value = validate(value, schema)
+    except SchemaError as e:
+        _count(call_site, 'failed')
+        raise LLMJSONError(f"Schema mismatch from {call_site}: {e}")
+
+    _count(call_site, 'salvaged' if salvaged else 'ok')
+    return value
+
+
+def validate(value, schema, path='$'):
+    """Validate and lightly coerce a value; raises SchemaError on mismatch"""
+    expected = schema.get('type')
+
+    if expected == 'object':
+        if not isinstance(value, dict):
+            raise SchemaError(f"{path}: expected object")
+        for key in schema.get('required', []):
+            if key not in value:
+                raise SchemaError(f"{path}.{key}: missing")
+        result = {}
+        properties = schema.get('properties', {})
+        for key, item in value.items():
+            if key in properties:
+                try:
+                    result[key] = validate(item, properties[key], f"{path}.{key}")
+                except SchemaError:
+                    if key in schema.get('required', []):
+                        raise
+                    # Optional fields with bad values are dropped, not fatal
+            else:
+                result[key] = item
+        return result
+
+    if expected == 'array':
+        if isinstance(value, str) and schema.get('items', {}).get('type') == 'string':
+            value = [part.strip() for part in value.split(',') if part.strip()]
+        if not isinstance(value, list):
+            raise SchemaError(f"{path}: expected array")
+        return [validate(item, schema.get('items', {}), f"{path}[{i}]") for i, item in enumerate(value)]
+
+    if expected == 'string':
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        if not isinstance(value, str):
+            raise SchemaError(f"{path}: expected string")
+        return value
+
+    if expected in ('integer', 'number'):
+        if isinstance(value, str):
+            try:
+                value = float(value.strip().rstrip('%'))
+            except ValueError:
+                raise SchemaError(f"{path}: expected {expected}")
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise SchemaError(f"{path}: expected {expected}")
+        return int(value) if expected == 'integer' else value
+
+    if expected == 'boolean':
+        if not isinstance(value, bool):
+            raise SchemaError(f"{path}: expected boolean")
+        return value
+
+    return value
+
+
+def _validate_array_items(value, schema):
+    """Keep the valid items of an array, returning (items, dropped_count)"""
+    if isinstance(value, dict):
+        # Some responses wrap the array, e.g. {"jobs": [...]}
+        lists = [v for v in value.values() if isinstance(v, list)]
+        value = lists[0] if len(lists) == 1 else [value]
+    if not isinstance(value, list):
+        raise SchemaError("$: expected array")
+
+    items, dropped = [], 0
+    for i, item in enumerate(value):
+        try:
+            items.append(validate(item, schema.get('items', {}), f"$[{i}]"))
+        except SchemaError:
+            dropped += 1
+    return items, dropped
+
+
+def _strip_fences(text):
+    text = text.strip()
+    if text.startswith('```'):
+        text = text.split('\n', 1)[1] if '\n' in text else ''
+        if text.rstrip().endswith('```'):
+            text = text.rstrip()[:-3]
+    return text.strip()
+
+
+def _skip(text, pos, chars=' \t\r\n,'):
+    while pos < len(text) and text[pos] in chars:
+        pos += 1
+    return pos
+
+
+def _salvage(text, expected_type):
+    """Recover the complete leading elements of a truncated or noisy JSON value"""
+    opener = '[' if expected_type == 'array' else '{'
+    start = text.find(opener)
+    if start == -1:
+        return None
+
+    # Surrounding prose is the common case; try the clean value first
+    try:
+        value, _ = _decoder.raw_decode(text, start)
+        return value
+    except ValueError:
+        pass
+
+    return _salvage_array(text, start) if opener == '[' else _salvage_object(text, start)
+
+
+def _salvage_array(text, start):
+    items = []
+    pos = start + 1
+    while True:
+        pos = _skip(text, pos)
+        if pos >= len(text) or text[pos] == ']':
+            break
+        try:
+            item, pos = _decoder.raw_decode(text, pos)
+        except ValueError:
+            break
+        items.append(item)
+    return items or None
+
+
+def _salvage_object(text, start):
+    result = {}
+    pos = start + 1
+    while True:
+        pos = _skip(text, pos)
+        if pos >= len(text) or text[pos] == '}':
+            break
+        try:
+            key, pos = _decoder.raw_decode(text, pos)
+            pos = _skip(text, pos, ' \t\r\n')
+            if not isinstance(key, str) or pos >= len(text) or text[pos] != ':':
+                break
+            value, pos = _decoder.raw_decode(text, _skip(text, pos + 1, ' \t\r\n'))
+        except ValueError:
+            break
+        result[key] = value
+    return result or None
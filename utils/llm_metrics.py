@@ -0,0 +1,194 @@
+# utils/llm_metrics.py
+import json
+import threading
+import time
+from config import Config
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = [0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0]
+
+
+def estimate_tokens(text):
+    """Rough token estimate (~4 characters per token) when usage is not reported"""
+    return max(1, len(str(text)) // 4) if text else 0
+
+
+def response_token_counts(response, prompt):
+    """Return (prompt_tokens, response_tokens) from usage metadata or an estimate"""
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is not None and getattr(usage, 'prompt_token_count', None):
+        return usage.prompt_token_count, getattr(usage, 'candidates_token_count', 0) or 0
+    text = getattr(response, 'text', '') if response is not None else ''
+    return estimate_tokens(prompt), estimate_tokens(text)
+
+
+class LLMMetrics:
+    """In-process aggregation of LLM calls per call site, split by model"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.pricing = json.loads(Config.LLM_PRICING)
+        self.log_interval = Config.LLM_METRICS_LOG_INTERVAL
+        self._last_log = time.time()
+
+    def _site(self, call_site):
+        if call_site not in self._stats:
+            self._stats[call_site] = {'fallbacks': 0, 'local': 0, 'cache_hits': 0, 'cache_misses': 0, 'routes': {}, 'models': {}}
+        return self._stats[call_site]
+
+    def _entry(self, call_site, model):
+        models = self._site(call_site)['models']
+        if model not in models:
+            models[model] = {
+                'calls': 0,
+                'errors': 0,
+                'prompt_tokens': 0,
+                'response_tokens': 0,
+                'wall_time': 0.0,
+                'max_wall_time': 0.0,
+                'cost': 0.0,
+                'buckets': [0] * (len(LATENCY_BUCKETS) + 1),
+            }
+        return models[model]
+
+    def record_call(self, call_site, model, wall_time, prompt_tokens=0, response_tokens=0, error=False):
+        """Record one LLM round trip"""
+        price = self.pricing.get(model, self.pricing.get('default', {}))
+        cost = (prompt_tokens * price.get('input', 0) + response_tokens * price.get('output', 0)) / 1_000_000
+
+        with self._lock:
+            entry = self._entry(call_site, model)
+            entry['calls'] += 1
+            entry['errors'] += 1 if error else 0
+            entry['prompt_tokens'] += prompt_tokens
+            entry['response_tokens'] += response_tokens
+            entry['wall_time'] += wall_time
+            entry['max_wall_time'] = max(entry['max_wall_time'], wall_time)
+            entry['cost'] += cost
+            bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS) if wall_time <= bound), len(LATENCY_BUCKETS))
+            entry['buckets'][bucket] += 1
+
+        self._maybe_log_summary()
+
+    def record_cache(self, call_site, hit):
+        """Record a cache lookup made in front of an LLM call"""
+        with self._lock:
+            self._site(call_site)['cache_hits' if hit else 'cache_misses'] += 1
+
+    def record_fallback(self, call_site):
+        """Record that a call site served its non-LLM fallback"""
+        with self._lock:
+            self._site(call_site)['fallbacks'] += 1
+
+    def record_local(self, call_site):
+        """Record a request answered by a local fast path without an LLM call"""
+        with self._lock:
+            self._site(call_site)['local'] += 1
+
+    def record_route(self, call_site, tier):
+        """Record which routing tier served a call"""
+        with self._lock:
+            routes = self._site(call_site)['routes']
+            routes[tier] = routes.get(tier, 0) + 1
+
+    def model_latency(self, model):
+        """Return (calls, average wall time) for a model across all call sites"""
+        with self._lock:
+            calls, wall_time = 0, 0.0
+            for site in self._stats.values():
+                entry = site['models'].get(model)
+                if entry:
+                    calls += entry['calls']
+                    wall_time += entry['wall_time']
+            return calls, (wall_time / calls if calls else 0.0)
+
+    def snapshot(self):
+        """Return a JSON-serialisable copy of the aggregates"""
+        with self._lock:
+            result = {}
+            for call_site, site in sorted(self._stats.items()):
+                models = {}
+                for model, entry in sorted(site['models'].items()):
+                    item = {k: v for k, v in entry.items() if k != 'buckets'}
+                    item['avg_wall_time'] = round(entry['wall_time'] / entry['calls'], 3) if entry['calls'] else 0.0
+                    item['cost'] = round(entry['cost'], 6)
+                    models[model] = item
+                result[call_site] = {
+                    'fallbacks': site['fallbacks'],
+                    'local': site['local'],
+                    'cache_hits': site['cache_hits'],
+                    'cache_misses': site['cache_misses'],
+                    'routes': dict(site['routes']),
+                    'models': models,
+                }
+            return result
+
+    def prometheus_text(self):
+        """Render the aggregates in the Prometheus text exposition format"""
+        lines = []
+        site_counters = [
+            ('llm_fallbacks_total', 'fallbacks'),
+            ('llm_local_total', 'local'),
+            ('llm_cache_hits_total', 'cache_hits'),
+            ('llm_cache_misses_total', 'cache_misses'),
+        ]
+        model_counters = [
+            ('llm_calls_total', 'calls'),
+            ('llm_errors_total', 'errors'),
+            ('llm_prompt_tokens_total', 'prompt_tokens'),
+            ('llm_response_tokens_total', 'response_tokens'),
+            ('llm_cost_total', 'cost'),
+        ]
+        with self._lock:
+            sites = sorted(self._stats.items())
+            for metric, field in site_counters:
+                lines.append(f"# TYPE {metric} counter")
+                for call_site, site in sites:
+                    lines.append(f'{metric}{{call_site="{call_site}"}} {site[field]}')
+
+            lines.append("# TYPE llm_routes_total counter")
+            for call_site, site in sites:
+                for tier, count in sorted(site['routes'].items()):
+                    lines.append(f'llm_routes_total{{call_site="{call_site}",tier="{tier}"}} {count}')
+
+            entries = [(call_site, model, entry) for call_site, site in sites for model, entry in sorted(site['models'].items())]
+            for metric, field in model_counters:
+                lines.append(f"# TYPE {metric} counter")
+                for call_site, model, entry in entries:
+                    lines.append(f'{metric}{{call_site="{call_site}",model="{model}"}} {entry[field]}')
+
+            lines.append("# TYPE llm_request_seconds histogram")
+            for call_site, model, entry in entries:
+                labels = f'call_site="{call_site}",model="{model}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ['+Inf'], entry['buckets']):
+                    cumulative += count
+                    lines.append(f'llm_request_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'llm_request_seconds_sum{{{labels}}} {round(entry["wall_time"], 4)}')
+                lines.append(f'llm_request_seconds_count{{{labels}}} {entry["calls"]}')
+        return '\n'.join(lines) + '\n'
+
+    def _maybe_log_summary(self):
+        """Print a one-line-per-call-site summary at most every log_interval seconds"""
+        if not self.log_interval:
+            return
+        now = time.time()
+        with self._lock:
+            if now - self._last_log < self.log_interval:
+                return
+            self._last_log = now
+
+        for call_site, site in self.snapshot().items():
+            lookups = site['cache_hits'] + site['cache_misses']
+            models = ', '.join(
+                f"{model}: calls={m['calls']} errors={m['errors']} tokens={m['prompt_tokens']}+{m['response_tokens']} "
+                f"avg={m['avg_wall_time']}s max={round(m['max_wall_time'], 3)}s cost=${m['cost']}"
+                for model, m in site['models'].items()
+            )
+            routes = ','.join(f"{tier}={count}" for tier, count in site['routes'].items())
+            print(f"LLM summary [{call_site}] fallbacks={site['fallbacks']} local={site['local']} cache={site['cache_hits']}/{lookups} routes={routes or '-'} {models}")
+
+
+# Global metrics registry
+llm_metrics = LLMMetrics()
@@ -0,0 +1,122 @@
+# utils/llm_router.py
+import json
+import os
+import threading
+from config import Config
+from utils.llm_metrics import llm_metrics
+
+# Used when no routing file or LLM_ROUTING override is present
+DEFAULT_POLICY = {
+    "tiers": {
+        "fast": "gemini-2.5-flash-lite",
+        "standard": "gemini-2.5-flash",
+        "heavy": "gemini-2.5-pro",
+        "batch": "gemini-2.5-flash-lite"
+    },
+    # Expected latency per model until enough calls have been observed
+    "expected_latency_ms": {
+        "gemini-2.5-flash-lite": 600,
+        "gemini-2.5-flash": 1500,
+        "gemini-2.5-pro": 5000
+    },
+    "default_tier": "standard",
+    # Rules are tried in order; the first whose max_chars fits the input wins
+    "routes": {
+        "enhance_text": [{"max_chars": 200, "tier": "fast"}, {"tier": "standard"}],
+        "translate_text": [{"max_chars": 300, "tier": "fast"}, {"tier": "standard"}],
+        "translate_batch": [{"tier": "standard"}],
+        "generate_professional_summary": [{"tier": "standard"}],
+        "generate_resume_sections": [{"tier": "standard"}],
+        "get_recommendations": [{"tier": "standard"}],
+        "chat": [{"max_chars": 400, "tier": "fast"}, {"tier": "standard"}]
+    },
+    # Latency SLO per call site; a slower choice is downgraded to a model that fits
+    "slo_ms": {
+        "enhance_text": 1500,
+        "translate_text": 2000,
+        "chat": 3000
+    },
+    # Observed calls per model needed before observed latency replaces the estimate
+    "min_observations": 20
+}
+
+
+class LLMRouter:
+    """Picks a model per call from call site, input length and latency SLO"""
+
+    def __init__(self):
+        self.enabled = Config.LLM_ROUTING_ENABLED
+        self.policy_file = Config.LLM_ROUTING_FILE
+        self._policy = None
+        self._policy_mtime = None
+        self._lock = threading.Lock()
+
+    def policy(self):
+        """Current policy; the routing file is re-read when it changes on disk"""
+        with self._lock:
+            if Config.LLM_ROUTING:
+                if self._policy is None:
+                    self._policy = self._merge(json.loads(Config.LLM_ROUTING))
+                return self._policy
+
+            mtime = os.path.getmtime(self.policy_file) if os.path.exists(self.policy_file) else None
+            if self._policy is None or mtime != self._policy_mtime:
+                overrides = {}
+                if mtime is not None:
+                    try:
+                        with open(self.policy_file, 'r', encoding='utf-8') as f:
+                            overrides = json.load(f)
+                    except Exception as e:
+                        print(f"LLM routing file error, using defaults: {e}")
+                self._policy = self._merge(overrides)
+                self._policy_mtime = mtime
+            return self._policy
+
+    def _merge(self, overrides):
+        policy = json.loads(json.dumps(DEFAULT_POLICY))
+        for key, value in overrides.items():
+            if isinstance(value, dict) and isinstance(policy.get(key), dict):
+                policy[key].update(value)
+            else:
+                policy[key] = value
+        return policy
+
+    def route(self, call_site, input_length, default_model, priority='interactive'):
+        """Return (model_name, tier) for a call"""
+        if not self.enabled:
+            return default_model, 'fixed'
+
+        policy = self.policy()
+        tiers = policy['tiers']
+
+        if priority == 'batch' and 'batch' in tiers:
+            return tiers['batch'], 'batch'
+
+        tier = policy['default_tier']
+        for rule in policy['routes'].get(call_site, []):
+            if 'max_chars' not in rule or input_length <= rule['max_chars']:
+                tier = rule['tier']
+                break
+        model = tiers.get(tier, default_model)
+
+        slo = policy['slo_ms'].get(call_site)
+        if slo and self.expected_latency_ms(model, policy) > slo:
+            # Take the most capable tier that still fits the SLO, else the fastest one
+            candidates = sorted(
+                ((self.expected_latency_ms(m, policy), name, m) for name, m in tiers.items() if name != 'batch'),
+            )
+            fitting = [c for c in candidates if c[0] <= slo]
+            _, tier, model = fitting[-1] if fitting else candidates[0]
+
+        return model, tier
+
+    def expected_latency_ms(self, model, policy):
+        """Observed average latency once there is enough data, else the configured prior"""
+        calls, average = llm_metrics.model_latency(model)
+        if calls >= policy.get('min_observations', 20):
+            return average * 1000
+        return policy['expected_latency_ms'].get(model, 0)
+
+
+# Global router shared by all call sites
+llm_router = LLMRouter()
@@ -0,0 +1,148 @@
+# utils/local_enhancer.py
+import re
+from config import Config
+from utils.professions import PROFESSIONS_CONFIG
+
+NUMBER_WORDS = {
+    'zero': 0, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
+    'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12,
+    'thirteen': 13, 'fourteen': 14, 'fifteen': 15, 'sixteen': 16, 'seventeen': 17,
+    'eighteen': 18, 'nineteen': 19, 'twenty': 20, 'twenty five': 25, 'thirty': 30,
+    'forty': 40, 'fifty': 50
+}
+
+# Spoken/short unit forms mapped to their written form
+UNITS = {
+    'yr': 'years', 'yrs': 'years', 'year': 'years', 'years': 'years',
+    'mth': 'months', 'mths': 'months', 'month': 'months', 'months': 'months',
+    'hr': 'hours', 'hrs': 'hours', 'hour': 'hours', 'hours': 'hours',
+    'kg': 'kg', 'kgs': 'kg', 'km': 'km', 'kms': 'km',
+    'sqft': 'sq ft', 'sq ft': 'sq ft', 'ft': 'ft', 'feet': 'ft',
+    'mm': 'mm', 'inch': 'inch', 'inches': 'inch', 'v': 'V', 'volt': 'V', 'volts': 'V',
+    'kw': 'kW', 'hp': 'HP', 'ton': 'ton', 'tons': 'ton'
+}
+
+YES_WORDS = {'yes', 'yeah', 'yep', 'haan', 'ha', 'han', 'ji haan', 'sure'}
+NO_WORDS = {'no', 'nope', 'nahi', 'nahin', 'na'}
+
+# Trade vocabulary that generic casing would get wrong
+COMMON_TERMS = [
+    'PVC', 'CPVC', 'UPVC', 'GI Pipe', 'HDPE', 'PPR', 'MCB', 'ELCB', 'RCCB', 'DB Box',
+    'AC', 'DC', 'LED', 'CCTV', 'HVAC', 'JCB', 'GPS', 'ITI', 'NCVT', 'CNC', 'MIG', 'TIG',
+    'LPG', 'RCC', 'POP', 'PPE', 'First Aid', 'Fire Safety'
+]
+
+_number_pattern = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([a-z ]*)$', re.IGNORECASE)
+_unit_words_pattern = re.compile(r'\b(' + '|'.join(re.escape(u) for u in UNITS) + r')\b')
+_unit_pattern = re.compile(
+    r'(\d+(?:\.\d+)?)\s*(' + '|'.join(sorted((re.escape(u) for u in UNITS), key=len, reverse=True)) + r')\b',
+    re.IGNORECASE
+)
+
+
+class LocalEnhancer:
+    """Deterministic enhancer for short or structured voice inputs"""
+
+    def __init__(self, professions_config=None, max_words=None):
+        self.professions_config = professions_config or PROFESSIONS_CONFIG
+        self.max_words = max_words if max_words is not None else Config.LOCAL_ENHANCE_MAX_WORDS
+        self.default_terms = self._build_terms({})
+        self.terms = {}
+        for profession, config in self.professions_config.items():
+            self.terms[profession] = self._build_terms(config)
+
+    def _build_terms(self, config):
+        """Return (pattern, lookup) matching trade terms as whole words, longest first"""
+        terms = {term.lower(): term for term in COMMON_TERMS}
+        for field in config.get('fields', []):
+            for option in field.get('options', []):
+                terms[option.lower()] = option
+        # Word boundaries on both sides so "ac" does not match inside "machine"
+        phrases = sorted(terms, key=len, reverse=True)
+        pattern = re.compile(r'\b(' + '|'.join(re.escape(p) for p in phrases) + r')\b', re.IGNORECASE)
+        return pattern, terms
+
+    def _field(self, field_name, profession):
+        for field in self.professions_config.get(profession, {}).get('fields', []):
+            if field['name'] == field_name:
+                return field
+        return None
+
+    def enhance(self, text, field_name, profession):
+        """Return the enhanced text, or None when the input should go to the LLM"""
+        text = ' '.join(text.split())
+        if not text:
+            return text
+
+        # Each rule applies only to the kind of field the profession config declares
+        field = self._field(field_name, profession) or {}
+        field_type = field.get('type')
+
+        if field_type == 'number':
+            number = self._parse_number(text)
+            if number is not None:
+                return number
+
+        if field_type == 'select':
+            options = field.get('options', [])
+            option = self._match_yes_no(text, options) or self._match_option(text, options)
+            if option:
+                return option
+
+        if field.get('format') == 'id':
+            return self._normalize_identifier(text)
+
+        if len(text.split()) <= self.max_words:
+            return self._polish(text, profession)
+
+        return None
+
+    def _parse_number(self, text):
+        lowered = text.lower().strip(' .')
+        match = _number_pattern.match(lowered)
+        if match and (not match.group(2).strip() or match.group(2).strip() in UNITS):
+            value = match.group(1)
+            return value[:-2] if value.endswith('.0') else value
+
+        # "five years", "twenty five yrs", "a year"
+        words = _unit_words_pattern.sub('', lowered).strip()
+        if words in NUMBER_WORDS:
+            return str(NUMBER_WORDS[words])
+        if words in ('a', 'an') and words != lowered:
+            return '1'
+        return None
+
+    def _match_yes_no(self, text, options):
+        """Yes/No selects: spoken yes/no forms ("haan", "nahi") as the option"""
+        by_answer = {option.lower(): option for option in options}
+        if set(by_answer) != {'yes', 'no'}:
+            return None
+        lowered = text.lower().strip(' .!')
+        if lowered in YES_WORDS:
+            return by_answer['yes']
+        if lowered in NO_WORDS:
+            return by_answer['no']
+        return None
+
+    def _match_option(self, text, options):
+        lowered = text.lower()
+        for option in sorted(options, key=len, reverse=True):
+            if option.lower() == lowered or re.search(r'\b' + re.escape(option.lower()) + r'\b', lowered):
+                return option
+        return None
+
+    def _normalize_identifier(self, text):
+        """License/ID numbers: upper-case, spoken separators removed"""
+        text = re.sub(r'\b(dash|hyphen)\b', '-', text, flags=re.IGNORECASE)
+        text = re.sub(r'\b(slash)\b', '/', text, flags=re.IGNORECASE)
+        text = re.sub(r'[^A-Za-z0-9/\- ]', '', text).upper()
+        return re.sub(r'\s*([/-])\s*', r'\1', text).strip()
+
+    def _polish(self, text, profession):
+        text = _unit_pattern.sub(lambda m: f"{m.group(1)} {UNITS[m.group(2).lower()]}", text)
+
+        pattern, terms = self.terms.get(profession, self.default_terms)
+        text = pattern.sub(lambda m: terms[m.group(1).lower()], text)
+
+        # Free text stays as said: only the first letter is capitalized
+        return text[0].upper() + text[1:]
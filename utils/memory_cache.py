@@ -0,0 +1,125 @@
+# utils/memory_cache.py
+import threading
+import unicodedata
+from collections import OrderedDict
+
+
+def normalize_text(text):
+    """Canonical form used for cache keys: NFC, trimmed, internal whitespace collapsed"""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def _entry_size(key, value):
+    return len(key.encode('utf-8')) + len(value.encode('utf-8'))
+
+
+class BoundedLRUCache:
+    """Thread-safe LRU cache bounded by entry count and approximate byte size"""
+
+    def __init__(self, max_entries=5000, max_bytes=8 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        size = _entry_size(key, value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= _entry_size(key, old)
+            self._data[key] = value
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                old_key, old_value = self._data.popitem(last=False)
+                self._bytes -= _entry_size(old_key, old_value)
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+
+class TieredTranslationCache:
+    """Memory LRU front tier over a durable store, with per-language hit counters"""
+
+    def __init__(self, store, max_entries, max_bytes):
+        self.store = store
+        self.memory = BoundedLRUCache(max_entries, max_bytes)
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(text, target_language, source_language):
+        return f"{source_language}_{target_language}_{normalize_text(text)}"
+
+    @classmethod
+    def normalize_key(cls, key):
+        """A legacy cache key ("en_hi_<raw text>") in the normalized form lookups use"""
+        parts = key.split('_', 2)
+        if len(parts) != 3:
+            return key
+        source_language, target_language, text = parts
+        return cls.make_key(text, target_language, source_language)
+
+    def _count(self, language, outcome):
+        with self._lock:
+            stats = self._stats.setdefault(language, {'memory_hits': 0, 'store_hits': 0, 'misses': 0})
+            stats[outcome] += 1
+
+    def get(self, text, target_language, source_language='en'):
+        key = self.make_key(text, target_language, source_language)
+        value = self.memory.get(key)
+        if value is not None:
+            self._count(target_language, 'memory_hits')
+            return value
+
+        value = self.store.get(key)
+        if value is not None:
+            self.memory.set(key, value)
+            self._count(target_language, 'store_hits')
+            return value
+
+        self._count(target_language, 'misses')
+        return None
+
+    def set(self, text, target_language, translated, source_language='en'):
+        key = self.make_key(text, target_language, source_language)
+        self.memory.set(key, translated)
+        self.store.set(key, translated)
+
+    def set_many(self, translations, target_language, source_language='en'):
+        """Cache {text: translation} pairs, writing the store in one transaction"""
+        items = [(self.make_key(text, target_language, source_language), translated) for text, translated in translations.items()]
+        for key, translated in items:
+            self.memory.set(key, translated)
+        self.store.set_many(items)
+
+    def stats(self):
+        """Per-language counters plus hit rate, and the memory tier's footprint"""
+        with self._lock:
+            languages = {}
+            for language, counts in self._stats.items():
+                total = sum(counts.values())
+                hits = counts['memory_hits'] + counts['store_hits']
+                languages[language] = dict(counts, hit_rate=round(hits / total, 3) if total else 0.0)
+        return {
+            'languages': languages,
+            'memory_entries': len(self.memory),
+            'memory_bytes': self.memory.size_bytes,
+            'evictions': self.memory.evictions,
+        }
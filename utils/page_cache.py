@@ -0,0 +1,74 @@
+# utils/page_cache.py
+import hashlib
+import threading
+from flask import make_response, render_template, request, session
+from config import Config
+from utils.i18n import catalog_language, catalogs
+from utils.memory_cache import BoundedLRUCache
+
+
+class PageCache:
+    """Rendered pages kept per (template, language, vary values, catalog version, deploy)
+
+    Only for pages whose output depends on nothing but those values. The ETag is
+    a hash of the rendered HTML, so it agrees across workers and changes whenever
+    the content does.
+    """
+
+    def __init__(self, max_entries, max_bytes):
+        self.pages = BoundedLRUCache(max_entries, max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._lock = threading.Lock()
+
+    def _count(self, outcome):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def render(self, template, vary=(), **context):
+        """render_template() served from the cache, with ETag/304 support"""
+        # Pending flash messages are consumed by the render and other methods may differ
+        if request.method != 'GET' or session.get('_flashes'):
+            self._count('bypassed')
+            return render_template(template, **context)
+
+        key = '|'.join(str(part) for part in (
+            template,
+            catalog_language(session.get('language', 'en')),
+            bool(session.get('authenticated')),
+            *vary,
+            catalogs.version,
+            Config.DEPLOY_VERSION
+        ))
+        entry = self.pages.get(key)
+        if entry is None:
+            self._count('misses')
+            html = render_template(template, **context)
+            etag = hashlib.sha1(html.encode('utf-8')).hexdigest()[:16]
+            self.pages.set(key, f"{etag}\n{html}")
+        else:
+            self._count('hits')
+            etag, html = entry.split('\n', 1)
+
+        response = make_response(html)
+        response.set_etag(etag)
+        # The page depends on the session cookie, so browsers revalidate and proxies do not share it
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        response.vary.add('Cookie')
+        return response.make_conditional(request)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'bypassed': self.bypassed,
+                'entries': len(self.pages),
+                'bytes': self.pages.size_bytes
+            }
+
+
+# Global page cache (per worker process; emptied on restart, i.e. on every deploy)
+page_cache = PageCache(Config.PAGE_CACHE_MAX_ENTRIES, Config.PAGE_CACHE_MAX_BYTES)
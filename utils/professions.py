@@ -0,0 +1,125 @@
+# utils/professions.py
+
+# COMPLETE profession configuration with ALL professions
+PROFESSIONS_CONFIG = {
+    "Driver": {
+        "icon": "fas fa-truck",
+        "fields": [
+            {"name": "license_number", "label": "Driving License Number", "type": "text", "format": "id", "required": True},
+            {"name": "vehicle_type", "label": "Vehicle Type", "type": "select", "options": ["Car", "Motorcycle", "Truck", "Bus", "Auto Rickshaw"], "required": True},
+            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
+            {"name": "areas_covered", "label": "Areas Covered", "type": "text", "required": False},
+            {"name": "license_type", "label": "License Type", "type": "select", "options": ["LMV", "MCWG", "HMV", "Transport"], "required": True}
+        ]
+    },
+    "Electrician": {
+        "icon": "fas fa-bolt", 
+        "fields": [
+            {"name": "license_number", "label": "Electrician License Number", "type": "text", "format": "id", "required": True},
+            {"name": "specialization", "label": "Specialization", "type": "select", "options": ["Domestic", "Industrial", "Commercial", "Automotive"], "required": True},
+            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
+            {"name": "certifications", "label": "Certifications", "type": "text", "required": False},
+            {"name": "wiring_types", "label": "Wiring Types Known", "type": "text", "required": False}
+        ]
+    },
+    "Plumber": {
+        "icon": "fas fa-faucet",
+        "fields": [
+            {"name": "license_number", "label": "Plumber License Number", "type": "text", "format": "id", "required": True},
+            {"name": "specialization", "label": "Specialization", "type": "select", "options": ["Residential", "Commercial", "Industrial", "Pipeline"], "required": True},
+            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
+            {"name": "pipe_materials", "label": "Pipe Materials Worked With", "type": "text", "required": False},
+            {"name": "tools", "label": "Tools Available", "type": "text", "required": False}
+        ]
+    },
+    "Carpenter": {
+        "icon": "fas fa-hammer",
+        "fields": [
+            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
+            {"name": "specialization", "label": "Specialization", "type": "select", "options": ["Furniture", "Cabinet", "Construction", "Repair"], "required": True},
+            {"name": "wood_types", "label": "Wood Types Worked With", "type": "text", "required": False},
+            {"name": "tools", "label": "Tools Available", "type": "text", "required": False},
+            {"name": "projects_completed", "label": "Projects Completed", "type": "number", "required": False}
+        ]
+    },
+    "Mechanic": {
+        "icon": "fas fa-tools",
+        "fields": [
+            {"name": "specialization", "label": "Specialization", "type": "select", "options": ["Car", "Motorcycle", "Heavy Vehicle", "AC Repair", "General"], "required": True},
+            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
+            {"name": "certifications", "label": "Certifications", "type": "text", "required": False},
+            {"name": "tools", "label": "Tools Available", "type": "text", "required": False},
+            {"name": "brands_expertise", "label": "Brands Expertise", "type": "text", "required": False}
+        ]
+    },
+    "Welder": {
+        "icon": "fas fa-fire",
+        "fields": [
+            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
+            {"name": "welding_types", "label": "Welding Types", "type": "select", "options": ["Arc", "MIG", "TIG", "Gas", "Spot"], "required": True},
+            {"name": "materials", "label": "Materials Worked With", "type": "text", "required": False},
+            {"name": "certifications", "label": "Welding Certifications", "type": "text", "required": False},
+            {"name": "safety_training", "label": "Safety Training", "type": "select", "options": ["Yes", "No"], "required": True}
+        ]
+    },
+    "Construction Worker": {
+        "icon": "fas fa-hard-hat",
+        "fields": [
+            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
+            {"name": "specialization", "label": "Specialization", "type": "select", "options": ["Masonry", "Painting", "Welding", "Scaffolding", "General Labor"], "required": True},
+            {"name": "skills", "label": "Specific Skills", "type": "text", "required": False},
+            {"name": "tools", "label": "Tools Available", "type": "text", "required": False},
+            {"name": "safety_certifications", "label": "Safety Certifications", "type": "text", "required": False}
+        ]
+    },
+    "Painter": {
+        "icon": "fas fa-paint-roller",
+        "fields": [
+            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
+            {"name": "painting_types", "label": "Painting Types", "type": "select", "options": ["Interior", "Exterior", "Commercial", "Residential", "Industrial"], "required": True},
+            {"name": "surface_types", "label": "Surface Types", "type": "text", "required": False},
+            {"name": "tools", "label": "Tools Available", "type": "text", "required": False},
+            {"name": "brands_expertise", "label": "Paint Brands Expertise", "type": "text", "required": False}
+        ]
+    },
+    "Mason": {
+        "icon": "fas fa-ruler-combined",
+        "fields": [
+            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
+            {"name": "specialization", "label": "Specialization", "type": "select", "options": ["Brick", "Stone", "Concrete", "Tile", "All Types"], "required": True},
+            {"name": "materials", "label": "Materials Worked With", "type": "text", "required": False},
+            {"name": "tools", "label": "Tools Available", "type": "text", "required": False},
+            {"name": "projects_completed", "label": "Projects Completed", "type": "number", "required": False}
+        ]
+    },
+    "Gardener": {
+        "icon": "fas fa-seedling",
+        "fields": [
+            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
+            {"name": "specialization", "label": "Specialization", "type": "select", "options": ["Landscaping", "Lawn Care", "Tree Surgery", "Nursery", "General Gardening"], "required": True},
+            {"name": "plant_types", "label": "Plant Types Expertise", "type": "text", "required": False},
+            {"name": "tools", "label": "Gardening Tools", "type": "text", "required": False},
+            {"name": "organic_methods", "label": "Organic Methods", "type": "select", "options": ["Yes", "No"], "required": False}
+        ]
+    },
+    "Security Guard": {
+        "icon": "fas fa-shield-alt",
+        "fields": [
+            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
+            {"name": "license_number", "label": "Security License Number", "type": "text", "format": "id", "required": True},
+            {"name": "specialization", "label": "Specialization", "type": "select", "options": ["Corporate", "Residential", "Event", "Industrial", "Mall Security"], "required": True},
+            {"name": "training_certifications", "label": "Training Certifications", "type": "text", "required": False},
+            {"name": "shift_preference", "label": "Shift Preference", "type": "select", "options": ["Day", "Night", "Rotating", "Any"], "required": True}
+        ]
+    },
+    "Cleaner": {
+        "icon": "fas fa-broom",
+        "fields": [
+            {"name": "experience_years", "label": "Years of Experience", "type": "number", "required": True},
+            {"name": "cleaning_types", "label": "Cleaning Types", "type": "select", "options": ["House", "Office", "Industrial", "Commercial", "Car"], "required": True},
+            {"name": "equipment", "label": "Cleaning Equipment", "type": "text", "required": False},
+            {"name": "chemicals_knowledge", "label": "Cleaning Chemicals Knowledge", "type": "select", "options": ["Basic", "Intermediate", "Expert"], "required": False},
+            {"name": "areas_covered", "label": "Areas Covered", "type": "text", "required": False}
+        ]
+    }
+}
@@ -0,0 +1,243 @@
+# utils/semantic_cache.py
+import hashlib
+import threading
+import time
+import unicodedata
+import zlib
+from config import Config
+from utils.memory_cache import normalize_text
+from utils.shared_cache import shared_cache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Function and question words that say nothing about what is being asked
+STOPWORDS = {
+    'a', 'about', 'am', 'an', 'and', 'any', 'are', 'as', 'at', 'be', 'can', 'could', 'do', 'does', 'for',
+    'from', 'get', 'have', 'how', 'i', 'if', 'in', 'is', 'it', 'me', 'much', 'my', 'of', 'on', 'or',
+    'please', 'should', 'so', 'tell', 'that', 'the', 'there', 'this', 'to', 'what', 'when', 'where',
+    'which', 'who', 'why', 'will', 'with', 'would', 'you', 'your',
+    'है', 'हैं', 'क्या', 'मैं', 'मुझे', 'मेरे', 'मेरी', 'मेरा', 'को', 'का', 'की', 'के', 'में', 'से', 'और',
+    'कैसे', 'कितना', 'कितनी', 'एक', 'पर', 'लिए', 'हूँ', 'हूं', 'हो', 'कर', 'करें', 'चाहिए',
+}
+
+# English number words, so "five years" and "5 years" ask the same thing
+NUMBER_WORDS = {
+    'zero': 0, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7, 'eight': 8,
+    'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12, 'fifteen': 15, 'twenty': 20, 'thirty': 30,
+}
+
+
+def words(text):
+    """Lower-cased words with punctuation stripped; vowel signs of Indic scripts are kept"""
+    result = []
+    for word in normalize_text(text).lower().split():
+        word = ''.join(ch for ch in word if not unicodedata.category(ch).startswith(('P', 'S')))
+        if word:
+            result.append(word)
+    return result
+
+
+def char_ngrams(text, sizes=(3, 4, 5)):
+    """Character n-grams of the lower-cased, space-padded words"""
+    text = f" {' '.join(words(text))} "
+    for n in sizes:
+        for i in range(len(text) - n + 1):
+            yield text[i:i + n]
+
+
+def content_terms(text):
+    """The words that decide what a question is about: professions, numbers, places...
+
+    Two questions can share most of their wording and still differ in one of
+    these, so a cached answer is only reused when they match exactly.
+    """
+    terms = set()
+    for word in words(text):
+        if word.isdigit():
+            terms.add(str(int(word)))  # also folds Devanagari and other script digits
+        elif word in NUMBER_WORDS:
+            terms.add(str(NUMBER_WORDS[word]))
+        elif word not in STOPWORDS:
+            terms.add(word[:-1] if len(word) > 3 and word.endswith('s') else word)
+    return frozenset(terms)
+
+
+class LanguageIndex:
+    """Hashed char n-gram TF-IDF vectors of answered questions in one language"""
+
+    def __init__(self, dimensions, max_entries, rows=()):
+        self.dimensions = dimensions
+        self.max_entries = max_entries
+        rows = list(rows)[-max_entries:] if max_entries else []
+        self.keys = [key for key, _, _ in rows]
+        self.answers = [answer for _, _, answer in rows]
+        self.terms = [content_terms(question) for _, question, _ in rows]
+        # Built in one allocation; appending row by row would copy the matrix each time
+        self.tf = np.array([self.term_frequencies(question) for _, question, _ in rows], dtype=np.float32)
+        self.tf = self.tf.reshape(len(rows), dimensions)
+        self.df = (self.tf > 0).sum(axis=0).astype(np.float32)
+        self._weighted = None
+
+    def term_frequencies(self, text):
+        # crc32 rather than hash(): buckets must agree across processes
+        counts = np.zeros(self.dimensions, dtype=np.float32)
+        for gram in char_ngrams(text):
+            counts[zlib.crc32(gram.encode('utf-8')) % self.dimensions] += 1
+        return np.log1p(counts)
+
+    def add(self, key, question, answer):
+        """Add one answered question; returns the key it pushed out, if any"""
+        if key in self.keys:
+            return None
+        tf = self.term_frequencies(question)
+        self.keys.append(key)
+        self.answers.append(answer)
+        self.terms.append(content_terms(question))
+        self.tf = np.vstack([self.tf, tf])
+        self.df += tf > 0
+        self._weighted = None
+        if len(self.keys) <= self.max_entries:
+            return None
+        self.df -= self.tf[0] > 0
+        self.tf = self.tf[1:]
+        self.answers.pop(0)
+        self.terms.pop(0)
+        return self.keys.pop(0)
+
+    def _idf(self):
+        return np.log((len(self.keys) + 1) / (self.df + 1)) + 1
+
+    def nearest(self, question):
+        """(similarity, answer) of the closest stored question with the same content terms, or (0.0, None)"""
+        terms = content_terms(question)
+        candidates = [i for i, stored in enumerate(self.terms) if stored == terms]
+        if not candidates:
+            return 0.0, None
+        idf = self._idf()
+        if self._weighted is None:
+            weighted = self.tf * idf
+            norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+            self._weighted = weighted / np.maximum(norms, 1e-9)
+        query = self.term_frequencies(question) * idf
+        norm = np.linalg.norm(query)
+        if not norm:
+            return 0.0, None
+        similarities = self._weighted[candidates] @ (query / norm)
+        best = int(np.argmax(similarities))
+        return float(similarities[best]), self.answers[candidates[best]]
+
+
+class SemanticAnswerCache:
+    """Past assistant answers reused for new questions that mean the same thing
+
+    Answered questions are stored in a shared cache namespace, with its TTL and
+    LRU eviction, so every worker can build the same per-language index; a
+    worker reloads when the namespace has changed. Disabled when NumPy is not
+    installed.
+    """
+
+    RELOAD_INTERVAL = 30  # seconds between checks for entries added by other workers
+
+    def __init__(self, store, threshold, dimensions, max_entries):
+        self.enabled = np is not None and threshold <= 1
+        self.threshold = threshold
+        self.dimensions = dimensions
+        self.max_entries = max_entries
+        self.store = store
+        self._indexes = {}
+        self._loaded_count = None
+        self._checked_at = 0
+        self._lock = threading.Lock()
+        self._stats = {}
+        if np is None:
+            print("Semantic answer cache disabled: numpy is not installed")
+
+    def _count(self, language, outcome):
+        stats = self._stats.setdefault(language, {'hits': 0, 'misses': 0, 'stored': 0})
+        stats[outcome] += 1
+
+    def _refresh(self):
+        """Rebuild the indexes when the shared store has changed; caller holds the lock"""
+        now = time.time()
+        if self._loaded_count is not None and now - self._checked_at < self.RELOAD_INTERVAL:
+            return
+        self._checked_at = now
+        count = len(self.store)
+        if count == self._loaded_count:
+            return
+        rows = sorted((row for _, row in self.store.items()), key=lambda row: row['created'])
+        by_language = {}
+        for row in rows:
+            by_language.setdefault(row['language'], {})[row['key']] = (row['key'], row['question'], row['answer'])
+        self._indexes = {
+            language: LanguageIndex(self.dimensions, self.max_entries, entries.values())
+            for language, entries in by_language.items()
+        }
+
+        # Drop stored rows that fell out of their language's index
+        kept = {key for index in self._indexes.values() for key in index.keys}
+        for row in rows:
+            if row['key'] not in kept:
+                self.store.delete(row['key'])
+        self._loaded_count = len(kept)
+
+    def _index(self, language):
+        if language not in self._indexes:
+            self._indexes[language] = LanguageIndex(self.dimensions, self.max_entries)
+        return self._indexes[language]
+
+    def lookup(self, question, language):
+        """Stored answer for a question similar enough to this one, or None"""
+        if not self.enabled or not question.strip():
+            return None
+        with self._lock:
+            self._refresh()
+            similarity, answer = self._index(language).nearest(question)
+            hit = answer is not None and similarity >= self.threshold
+            self._count(language, 'hits' if hit else 'misses')
+        return answer if hit else None
+
+    def add(self, question, language, answer):
+        if not self.enabled or not question.strip() or not answer:
+            return
+        key = hashlib.sha256(f"{language}\n{normalize_text(question).lower()}".encode('utf-8')).hexdigest()
+        row = {'key': key, 'language': language, 'question': question, 'answer': answer, 'created': time.time()}
+        try:
+            self.store.set(key, row)
+        except Exception as e:
+            print(f"Semantic cache store error: {e}")
+            return
+        with self._lock:
+            index = self._index(language)
+            added = key not in index.keys
+            evicted = index.add(key, question, answer)
+            if evicted:
+                self.store.delete(evicted)
+            # Keeps _refresh from mistaking this worker's own row for another worker's
+            if self._loaded_count is not None and added and not evicted:
+                self._loaded_count += 1
+            self._count(language, 'stored')
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'threshold': self.threshold,
+                'languages': {
+                    language: dict(self._stats.get(language, {}), entries=len(index.keys))
+                    for language, index in self._indexes.items()
+                }
+            }
+
+
+# Global semantic cache for assistant answers
+semantic_cache = SemanticAnswerCache(
+    shared_cache.namespace('semantic_answers', Config.SEMANTIC_CACHE_TTL),
+    Config.SEMANTIC_CACHE_THRESHOLD,
+    Config.SEMANTIC_CACHE_DIMENSIONS,
+    Config.SEMANTIC_CACHE_MAX_ENTRIES
+)
@@ -0,0 +1,351 @@
+# utils/shared_cache.py
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import threading
+import time
+from config import Config
+from utils.cache_store import open_connection
+
+
+def cache_key(*parts):
+    """Stable key for a combination of inputs (strings, numbers, dicts, lists)"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SharedCache:
+    """Host-wide cache on one SQLite file, shared by every worker process
+
+    Entries live in namespaces with an optional TTL. The file is kept under
+    max_bytes by evicting the least recently used entries, and get_or_compute
+    takes a lease so only one worker computes a missing value while the others
+    wait for it.
+    """
+
+    # Least-recently-used bookkeeping is only refreshed this often per entry
+    TOUCH_INTERVAL = 60
+    EVICT_EVERY = 200
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes = 0
+        self._stats = {}
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute('''CREATE TABLE IF NOT EXISTS entries (
+            namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, size INTEGER NOT NULL,
+            expires_at REAL, accessed_at REAL NOT NULL, PRIMARY KEY (namespace, key))''')
+        conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)')
+        conn.execute('''CREATE TABLE IF NOT EXISTS leases (
+            namespace TEXT NOT NULL, key TEXT NOT NULL, owner TEXT NOT NULL, expires_at REAL NOT NULL,
+            PRIMARY KEY (namespace, key))''')
+
+    def _connection(self):
+        """One connection per thread and per process (connections must not cross a fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = open_connection(self.path)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, namespace, outcome):
+        with self._lock:
+            stats = self._stats.setdefault(namespace, {'hits': 0, 'misses': 0, 'computed': 0, 'waited': 0})
+            stats[outcome] += 1
+
+    def namespace(self, name, ttl=None):
+        return CacheNamespace(self, name, ttl)
+
+    def get(self, namespace, key, default=None):
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute(
+            'SELECT value, expires_at, accessed_at FROM entries WHERE namespace = ? AND key = ?',
+            (namespace, key)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            self._count(namespace, 'misses')
+            return default
+        if now - row[2] > self.TOUCH_INTERVAL:
+            conn.execute('UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?', (now, namespace, key))
+        self._count(namespace, 'hits')
+        return json.loads(row[0])
+
+    def get_many(self, namespace, keys):
+        """Return {key: value} for the keys that are present and not expired"""
+        keys = list(keys)
+        now = time.time()
+        found = {}
+        conn = self._connection()
+        # Stay well below SQLite's bound-parameter limit
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(
+                f'SELECT key, value FROM entries WHERE namespace = ? AND key IN ({placeholders}) '
+                f'AND (expires_at IS NULL OR expires_at > ?)',
+                [namespace, *chunk, now]
+            )
+            for key, value in rows:
+                found[key] = json.loads(value)
+        return found
+
+    def set(self, namespace, key, value, ttl=None):
+        self.set_many(namespace, [(key, value)], ttl)
+
+    def set_many(self, namespace, items, ttl=None):
+        """Write several entries in one transaction"""
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        rows = []
+        for key, value in items:
+            encoded = json.dumps(value, ensure_ascii=False)
+            rows.append((namespace, key, encoded, len(key) + len(encoded.encode('utf-8')), expires_at, now))
+        if not rows:
+            return
+        conn = self._connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany(
+                'INSERT OR REPLACE INTO entries (namespace, key, value, size, expires_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                rows
+            )
+        with self._lock:
+            self._writes += len(rows)
+            due = self._writes >= self.EVICT_EVERY
+            if due:
+                self._writes = 0
+        if due:
+            self.evict()
+
+    def increment(self, namespace, key, ttl):
+        """Add one to a counter shared by all workers and return the new count
+
+        The counter expires ttl seconds after its first increment, which makes
+        it a fixed window for rate limits.
+        """
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                'SELECT value, expires_at FROM entries WHERE namespace = ? AND key = ?', (namespace, key)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                count, expires_at = 1, now + ttl
+            else:
+                count, expires_at = json.loads(row[0]) + 1, row[1]
+            encoded = json.dumps(count)
+            conn.execute(
+                'INSERT OR REPLACE INTO entries (namespace, key, value, size, expires_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (namespace, key, encoded, len(key) + len(encoded), expires_at, now)
+            )
+        return count
+
+    def delete(self, namespace, key):
+        self._connection().execute('DELETE FROM entries WHERE namespace = ? AND key = ?', (namespace, key))
+
+    def items(self, namespace):
+        """All (key, value) pairs of a namespace that have not expired"""
+        rows = self._connection().execute(
+            'SELECT key, value FROM entries WHERE namespace = ? AND (expires_at IS NULL OR expires_at > ?)',
+            (namespace, time.time())
+        ).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def count(self, namespace):
+        return self._connection().execute('SELECT COUNT(*) FROM entries WHERE namespace = ?', (namespace,)).fetchone()[0]
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under 90% of max_bytes"""
+        conn = self._connection()
+        try:
+            conn.execute('DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?', (time.time(),))
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            target = self.max_bytes * 0.9
+            while total > target:
+                rows = conn.execute('SELECT namespace, key, size FROM entries ORDER BY accessed_at LIMIT 500').fetchall()
+                if not rows:
+                    break
+                with conn:
+                    conn.execute('BEGIN IMMEDIATE')
+                    for namespace, key, size in rows:
+                        conn.execute('DELETE FROM entries WHERE namespace = ? AND key = ?', (namespace, key))
+                        total -= size
+                        if total <= target:
+                            break
+        except Exception as e:
+            print(f"Shared cache eviction error: {e}")
+
+    def _acquire_lease(self, namespace, key, seconds):
+        """The owner token if this thread now holds the lease, else None"""
+        now = time.time()
+        owner = f"{os.getpid()}-{threading.get_ident()}-{now}"
+        conn = self._connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('DELETE FROM leases WHERE namespace = ? AND key = ? AND expires_at <= ?', (namespace, key, now))
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO leases (namespace, key, owner, expires_at) VALUES (?, ?, ?, ?)',
+                (namespace, key, owner, now + seconds)
+            )
+            return owner if cursor.rowcount == 1 else None
+
+    def _release_lease(self, namespace, key, owner):
+        # Only our own lease: once it expired another worker may hold the key
+        self._connection().execute(
+            'DELETE FROM leases WHERE namespace = ? AND key = ? AND owner = ?', (namespace, key, owner)
+        )
+
+    @contextlib.contextmanager
+    def lease(self, namespace, key, seconds=5, wait=True):
+        """Hold the lease on key for the duration of the with block, across all workers
+
+        Blocks while another thread or worker holds it, or with wait=False goes
+        ahead without it; the block gets whether the lease is held. A holder
+        that died loses it after seconds.
+        """
+        owner = self._acquire_lease(namespace, key, seconds)
+        while owner is None and wait:
+            time.sleep(0.01)
+            owner = self._acquire_lease(namespace, key, seconds)
+        try:
+            yield owner is not None
+        finally:
+            if owner:
+                self._release_lease(namespace, key, owner)
+
+    def _store_computed(self, namespace, key, value, ttl):
+        self._count(namespace, 'computed')
+        if value is not None:
+            self.set(namespace, key, value, ttl)
+        return value
+
+    def get_or_compute(self, namespace, key, compute, ttl=None, lease_seconds=30, max_wait=None):
+        """Cached value, or compute() it exactly once across all workers and cache the result
+
+        While another worker holds the lease this waits for its result, at most
+        max_wait seconds (default lease_seconds), then computes without the lease.
+        Exceptions from compute() propagate and nothing is cached; a None result
+        is not cached either.
+        """
+        value = self.get(namespace, key)
+        if value is not None:
+            return value
+
+        wait_until = time.time() + (lease_seconds if max_wait is None else max_wait)
+        owner = self._acquire_lease(namespace, key, lease_seconds)
+        while owner is None:
+            # Someone else is computing it; wait for their result, or take over once their lease expires
+            time.sleep(0.05)
+            value = self.get(namespace, key)
+            if value is not None:
+                self._count(namespace, 'waited')
+                return value
+            if time.time() > wait_until:
+                break
+            owner = self._acquire_lease(namespace, key, lease_seconds)
+
+        try:
+            return self._store_computed(namespace, key, compute(), ttl)
+        finally:
+            if owner:
+                self._release_lease(namespace, key, owner)
+
+    async def get_or_compute_async(self, namespace, key, compute, ttl=None, lease_seconds=30, max_wait=None):
+        """get_or_compute() for the asyncio app; compute is a coroutine function
+
+        SQLite calls run on threads and the wait for another worker's lease
+        sleeps on the event loop, so waiting never blocks other requests.
+        """
+        value = await asyncio.to_thread(self.get, namespace, key)
+        if value is not None:
+            return value
+
+        wait_until = time.time() + (lease_seconds if max_wait is None else max_wait)
+        owner = await asyncio.to_thread(self._acquire_lease, namespace, key, lease_seconds)
+        while owner is None:
+            await asyncio.sleep(0.05)
+            value = await asyncio.to_thread(self.get, namespace, key)
+            if value is not None:
+                self._count(namespace, 'waited')
+                return value
+            if time.time() > wait_until:
+                break
+            owner = await asyncio.to_thread(self._acquire_lease, namespace, key, lease_seconds)
+
+        try:
+            value = await compute()
+            return await asyncio.to_thread(self._store_computed, namespace, key, value, ttl)
+        finally:
+            if owner:
+                await asyncio.to_thread(self._release_lease, namespace, key, owner)
+
+    def stats(self):
+        """Per-namespace entry counts and sizes plus this process's hit counters"""
+        rows = self._connection().execute(
+            'SELECT namespace, COUNT(*), COALESCE(SUM(size), 0) FROM entries GROUP BY namespace'
+        ).fetchall()
+        with self._lock:
+            counters = {name: dict(counts) for name, counts in self._stats.items()}
+        namespaces = {}
+        for name, entries, size in rows:
+            namespaces[name] = dict(counters.pop(name, {}), entries=entries, bytes=size)
+        namespaces.update(counters)
+        return {'namespaces': namespaces, 'max_bytes': self.max_bytes}
+
+
+class CacheNamespace:
+    """View of one namespace of a SharedCache with a default TTL"""
+
+    def __init__(self, cache, name, ttl=None):
+        self.cache = cache
+        self.name = name
+        self.ttl = ttl
+
+    def get(self, key, default=None):
+        return self.cache.get(self.name, key, default)
+
+    def get_many(self, keys):
+        return self.cache.get_many(self.name, keys)
+
+    def set(self, key, value):
+        self.cache.set(self.name, key, value, self.ttl)
+
+    def set_many(self, items):
+        self.cache.set_many(self.name, items, self.ttl)
+
+    def delete(self, key):
+        self.cache.delete(self.name, key)
+
+    def get_or_compute(self, key, compute, max_wait=None):
+        return self.cache.get_or_compute(self.name, key, compute, self.ttl, max_wait=max_wait)
+
+    async def get_or_compute_async(self, key, compute, max_wait=None):
+        return await self.cache.get_or_compute_async(self.name, key, compute, self.ttl, max_wait=max_wait)
+
+    def items(self):
+        return self.cache.items(self.name)
+
+    def lease(self, key, seconds=5, wait=True):
+        return self.cache.lease(self.name, key, seconds, wait)
+
+    def __len__(self):
+        return self.cache.count(self.name)
+
+
+# Global shared cache, one per host
+shared_cache = SharedCache(Config.SHARED_CACHE_DB, Config.SHARED_CACHE_MAX_BYTES)
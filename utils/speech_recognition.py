@@ -1,13 +1,145 @@
 # utils/speech_recognition.py
+import asyncio
 import base64
+import subprocess
+import threading
 import speech_recognition as sr
-import io
-from pydub import AudioSegment
-import tempfile
-import os
+from config import Config
+from utils.stt_engines import speech_engines
+
+# Decoded audio handed to the recognizer: 16 kHz, mono, 16-bit PCM
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+CHUNK_SIZE = 64 * 1024
+
+
+class AudioLimitError(ValueError):
+    """An upload is larger or longer than allowed"""
+
+
+def _ffmpeg_command(max_seconds):
+    # -t one sample past the limit, so audio that is too long can be told apart from audio that fits
+    return [
+        'ffmpeg', '-hide_banner', '-loglevel', 'error', '-i', 'pipe:0',
+        '-t', str(max_seconds + 1 / SAMPLE_RATE), '-ac', '1', '-ar', str(SAMPLE_RATE), '-f', 's16le', 'pipe:1'
+    ]
+
+
+def _check_duration(pcm, max_seconds):
+    if len(pcm) > max_seconds * SAMPLE_RATE * SAMPLE_WIDTH:
+        raise AudioLimitError(f"Audio longer than {max_seconds} seconds")
+
+
+def decode_stream(chunks, max_bytes=None, max_seconds=None):
+    """PCM of an audio upload, decoded by ffmpeg while the bytes are still arriving
+
+    chunks is any iterable of bytes (a request stream, a file, a single
+    buffer). Reading stops as soon as the upload passes max_bytes or the
+    decoded audio passes max_seconds; either raises AudioLimitError.
+    """
+    max_bytes = max_bytes or Config.SPEECH_MAX_BYTES
+    max_seconds = max_seconds or Config.SPEECH_MAX_SECONDS
+    process = subprocess.Popen(
+        _ffmpeg_command(max_seconds), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    errors = []
+
+    def feed():
+        received = 0
+        try:
+            for chunk in chunks:
+                received += len(chunk)
+                if received > max_bytes:
+                    errors.append(AudioLimitError(f"Audio larger than {max_bytes} bytes"))
+                    break
+                process.stdin.write(chunk)
+        except (BrokenPipeError, OSError):
+            pass  # ffmpeg stopped reading: duration limit reached or undecodable input
+        except Exception as e:
+            errors.append(e)
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    writer = threading.Thread(target=feed, name="audio-upload", daemon=True)
+    writer.start()
+    pcm = process.stdout.read()
+    stderr = process.stderr.read()
+    process.wait()
+    writer.join()
+
+    if errors:
+        raise errors[0]
+    _check_duration(pcm, max_seconds)
+    if process.returncode != 0 and not pcm:
+        raise ValueError(f"Could not decode audio: {stderr.decode('utf-8', 'replace').strip()}")
+    return pcm
+
+
+async def decode_stream_async(chunks, max_bytes=None, max_seconds=None):
+    """decode_stream() for the asyncio app; chunks is an async iterable of bytes"""
+    max_bytes = max_bytes or Config.SPEECH_MAX_BYTES
+    max_seconds = max_seconds or Config.SPEECH_MAX_SECONDS
+    command = _ffmpeg_command(max_seconds)
+    process = await asyncio.create_subprocess_exec(
+        *command, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+
+    async def feed():
+        received = 0
+        try:
+            async for chunk in chunks:
+                received += len(chunk)
+                if received > max_bytes:
+                    raise AudioLimitError(f"Audio larger than {max_bytes} bytes")
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # ffmpeg stopped reading: duration limit reached or undecodable input
+        finally:
+            process.stdin.close()
 
-def transcribe_audio(audio_data):
-    """Transcribe audio data to text with enhanced error handling"""
+    try:
+        _, pcm, stderr = await asyncio.gather(feed(), process.stdout.read(), process.stderr.read())
+    except Exception:
+        process.kill()
+        await process.wait()
+        raise
+    await process.wait()
+
+    _check_duration(pcm, max_seconds)
+    if process.returncode != 0 and not pcm:
+        raise ValueError(f"Could not decode audio: {stderr.decode('utf-8', 'replace').strip()}")
+    return pcm
+
+
+def recognize_pcm(pcm, language='en-IN'):
+    """Text of decoded speech, or a message for the user when it cannot be recognized"""
+    if not pcm:
+        return "No audio data received"
+    try:
+        return speech_engines.recognize(pcm, SAMPLE_RATE, SAMPLE_WIDTH, language)
+    except sr.UnknownValueError:
+        return "Could not understand audio. Please speak clearly."
+    except sr.RequestError as e:
+        return f"Speech recognition service error: {e}"
+
+
+def transcribe_stream(chunks, language='en-IN'):
+    """Transcribe a streamed audio upload; AudioLimitError propagates for the caller to report"""
+    try:
+        pcm = decode_stream(chunks)
+    except AudioLimitError:
+        raise
+    except Exception as e:
+        return f"Audio processing error: {e}"
+    return recognize_pcm(pcm, language)
+
+
+def transcribe_audio(audio_data, language='en-IN'):
+    """Transcribe base64 audio data (optionally a data: URL) to text with enhanced error handling"""
     try:
         # Check if audio data is provided
         if not audio_data:
@@ -18,45 +150,10 @@ def transcribe_audio(audio_data):
             # Remove data URL prefix
             audio_data = audio_data.split(',')[1]
         
-        # Decode base64 audio data
-        audio_bytes = base64.b64decode(audio_data)
-        
-        # Create temporary file for audio processing
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.webm') as temp_audio:
-            temp_audio.write(audio_bytes)
-            temp_audio_path = temp_audio.name
-        
-        try:
-            # Convert to WAV format using pydub
-            audio = AudioSegment.from_file(temp_audio_path)
-            wav_io = io.BytesIO()
-            audio.export(wav_io, format='wav')
-            wav_io.seek(0)
-            
-            # Initialize recognizer
-            recognizer = sr.Recognizer()
-            
-            # Adjust for ambient noise and set timeout
-            with sr.AudioFile(wav_io) as source:
-                recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                audio_data = recognizer.record(source)
-            
-            # Use Google Speech Recognition with Indian English preference
-            text = recognizer.recognize_google(audio_data, language='en-IN')
-            return text
-            
-        except sr.UnknownValueError:
-            return "Could not understand audio. Please speak clearly."
-        except sr.RequestError as e:
-            return f"Speech recognition service error: {e}"
-        except Exception as e:
-            return f"Audio processing error: {e}"
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_audio_path):
-                os.unlink(temp_audio_path)
-                
+        # Decoded straight into ffmpeg; no temporary file
+        return transcribe_stream([base64.b64decode(audio_data)], language)
+    except AudioLimitError:
+        raise
     except Exception as e:
         print(f"Speech recognition overall error: {e}")
         return "Error processing audio. Please try again."
@@ -82,8 +179,8 @@ def transcribe_audio_file(file_path):
             recognizer.adjust_for_ambient_noise(source)
             audio = recognizer.record(source)
             
-        text = recognizer.recognize_google(audio, language='en-IN')
-        return text
+        pcm = audio.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=SAMPLE_WIDTH)
+        return speech_engines.recognize(pcm, SAMPLE_RATE, SAMPLE_WIDTH, 'en-IN')
     except Exception as e:
         print(f"File transcription error: {e}")
         return None
\ No newline at end of file
@@ -0,0 +1,197 @@
+# utils/stt_engines.py
+import abc
+import json
+import threading
+import speech_recognition as sr
+from config import Config
+
+try:
+    import vosk
+except ImportError:
+    vosk = None
+
+
+class STTEngine(abc.ABC):
+    """A speech recognizer for 16 kHz mono 16-bit PCM
+
+    recognize() returns (text, confidence between 0 and 1). It raises
+    sr.UnknownValueError when nothing was recognized and sr.RequestError when
+    the engine could not run.
+    """
+
+    name = None
+    local = False
+
+    def available(self, language):
+        return True
+
+    @abc.abstractmethod
+    def recognize(self, pcm, sample_rate, sample_width, language):
+        """(text, confidence) of the speech in pcm"""
+
+
+class GoogleEngine(STTEngine):
+    """Google Web Speech API; one network round trip per clip"""
+
+    name = "google"
+
+    def recognize(self, pcm, sample_rate, sample_width, language):
+        audio = sr.AudioData(pcm, sample_rate, sample_width)
+        # Google may leave out the confidence; the library reports 0.5 then
+        return sr.Recognizer().recognize_google(audio, language=language, with_confidence=True)
+
+
+class VoskEngine(STTEngine):
+    """Offline Kaldi models on the CPU, one per language
+
+    A model is loaded the first time its language is needed (or at warm-up)
+    and kept for the life of the worker; each clip only creates a recognizer
+    on top of it.
+    """
+
+    name = "vosk"
+    local = True
+
+    def __init__(self, model_dirs):
+        self.model_dirs = model_dirs
+        self._models = {}
+        self._failed = set()  # languages whose model did not load; not retried
+        self._lock = threading.Lock()
+        if vosk is not None:
+            vosk.SetLogLevel(-1)
+
+    def available(self, language):
+        return vosk is not None and language in self.model_dirs and language not in self._failed
+
+    def model(self, language):
+        if language not in self._models:
+            with self._lock:
+                if language not in self._models:
+                    try:
+                        self._models[language] = vosk.Model(self.model_dirs[language])
+                    except Exception as e:
+                        self._failed.add(language)
+                        raise sr.RequestError(f"Vosk model for {language} could not be loaded: {e}")
+        return self._models[language]
+
+    def recognize(self, pcm, sample_rate, sample_width, language):
+        if not self.available(language):
+            raise sr.RequestError(f"No Vosk model for {language}")
+        recognizer = vosk.KaldiRecognizer(self.model(language), sample_rate)
+        recognizer.SetWords(True)
+        # Fed in 0.25s pieces so finished utterances come back as separate results
+        step = sample_rate * sample_width // 4
+        results = []
+        for start in range(0, len(pcm), step):
+            if recognizer.AcceptWaveform(pcm[start:start + step]):
+                results.append(json.loads(recognizer.Result()))
+        results.append(json.loads(recognizer.FinalResult()))
+
+        words = [word for result in results for word in result.get('result', [])]
+        text = " ".join(result['text'] for result in results if result.get('text'))
+        if not text:
+            raise sr.UnknownValueError()
+        confidence = sum(word['conf'] for word in words) / len(words) if words else 0.0
+        return text, confidence
+
+
+class SpeechEngines:
+    """Picks the speech engine for each language
+
+    A local engine answers on its own when it is confident enough; below
+    min_confidence (or when it recognizes nothing) the clip goes to the online
+    fallback, and if that cannot be reached the local text is still used.
+    """
+
+    def __init__(self, engines, selection, fallback, min_confidence):
+        self.engines = {engine.name: engine for engine in engines}
+        self.selection = selection
+        self.fallback = self.engines[fallback]
+        self.min_confidence = min_confidence
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _count(self, language, outcome):
+        with self._lock:
+            stats = self._stats.setdefault(language, {'local': 0, 'fallback': 0, 'online': 0, 'offline_only': 0})
+            stats[outcome] += 1
+
+    def engine_for(self, language):
+        name = self.selection.get(language, self.selection.get('*', self.fallback.name))
+        engine = self.engines.get(name)
+        if engine is None or not engine.available(language):
+            return self.fallback
+        return engine
+
+    def recognize(self, pcm, sample_rate, sample_width, language):
+        """Text of the speech in pcm; raises like STTEngine.recognize"""
+        engine = self.engine_for(language)
+        if not engine.local:
+            self._count(language, 'online')
+            return self.fallback.recognize(pcm, sample_rate, sample_width, language)[0]
+
+        text, confidence = None, 0.0
+        try:
+            text, confidence = engine.recognize(pcm, sample_rate, sample_width, language)
+        except sr.UnknownValueError:
+            pass
+        except sr.RequestError as e:
+            print(f"Local speech recognition error: {e}")
+        if text and confidence >= self.min_confidence:
+            self._count(language, 'local')
+            return text
+
+        try:
+            result = self.fallback.recognize(pcm, sample_rate, sample_width, language)[0]
+        except sr.RequestError:
+            if not text:
+                raise
+            self._count(language, 'offline_only')
+            return text
+        self._count(language, 'fallback')
+        return result
+
+    def warm_up(self):
+        """Load the local models of every language selected for one, so first requests don't wait"""
+        languages = set(self.selection) | set(self.engines['vosk'].model_dirs)
+        for language in languages - {'*'}:
+            engine = self.engine_for(language)
+            if isinstance(engine, VoskEngine):
+                try:
+                    engine.model(language)
+                except sr.RequestError as e:
+                    print(f"Speech model warm-up error: {e}")
+
+    def start_warm_up(self):
+        if Config.STT_WARMUP:
+            threading.Thread(target=self.warm_up, name="stt-warmup", daemon=True).start()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'engines': {
+                    language: self.engine_for(language).name
+                    for language in set(self.selection) | set(self._stats) if language != '*'
+                },
+                'min_confidence': self.min_confidence,
+                'languages': {language: dict(stats) for language, stats in self._stats.items()}
+            }
+
+
+def _load_json(value, setting):
+    try:
+        return json.loads(value) if value else {}
+    except ValueError as e:
+        print(f"{setting} error: {e}")
+        return {}
+
+
+# Global speech engine selection
+speech_engines = SpeechEngines(
+    [GoogleEngine(), VoskEngine(_load_json(Config.STT_VOSK_MODELS, 'STT_VOSK_MODELS'))],
+    _load_json(Config.STT_ENGINES, 'STT_ENGINES'),
+    'google',
+    Config.STT_MIN_CONFIDENCE
+)
+if vosk is None and any(name == 'vosk' for name in speech_engines.selection.values()):
+    print("Offline speech recognition disabled: vosk is not installed (see requirements-optional.txt)")
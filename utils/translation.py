@@ -1,18 +1,20 @@
 # utils/translation.py
-import google.generativeai as genai
+import asyncio
 import json
 import os
 from config import Config
-from functools import lru_cache
+from utils.llm_client import llm_client
+from utils.llm_metrics import llm_metrics
+from utils.shared_cache import shared_cache
+from utils.memory_cache import TieredTranslationCache, normalize_text
+from utils.llm_json import generate_json, LLMJSONError, BATCH_TRANSLATION_SCHEMA
+from utils.i18n import catalogs
+from utils.glossary import Glossary, domain_terms
 
 class AITranslator:
     def __init__(self):
         self.api_key = Config.GEMINI_API_KEY
-        if self.api_key:
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel('gemini-pro')
-        else:
-            self.model = None
+        self.model = llm_client.get_model('gemini-pro')
         
         # Enhanced language code mapping with better Indian language support
         self.language_codes = {
@@ -56,53 +58,128 @@ class AITranslator:
             }
         }
         
-        # Cache for translations
-        self.translation_cache = self.load_cache()
+        # Closed domain vocabulary answered in-process from the compiled catalogs
+        self.glossary = Glossary(domain_terms(self.common_phrases['en'].values()), catalogs)
+        
+        # Durable translation cache, opened on first use
+        self._translation_cache = None
+
+    @property
+    def translation_cache(self):
+        """Bounded in-memory LRU over the shared cache used by all worker processes"""
+        if self._translation_cache is None:
+            self._translation_cache = self.load_cache()
+        return self._translation_cache
 
     def load_cache(self):
-        """Load translation cache from file"""
-        cache_file = 'instance/translation_cache.json'
-        if os.path.exists(cache_file):
-            try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
-
-    def save_cache(self):
-        """Save translation cache to file"""
-        cache_file = 'instance/translation_cache.json'
-        os.makedirs('instance', exist_ok=True)
+        """Open the translation cache tiers, migrating the legacy JSON cache once"""
+        store = shared_cache.namespace('translation')
+        json_path = Config.TRANSLATION_CACHE_LEGACY_JSON
+        if os.path.exists(json_path):
+            # Under the shared-cache lease, so only one worker imports while the others wait
+            shared_cache.get_or_compute('migrations', f"translation:{json_path}", lambda: self._import_legacy_cache(store))
+        return TieredTranslationCache(
+            store,
+            Config.TRANSLATION_MEMORY_MAX_ENTRIES,
+            Config.TRANSLATION_MEMORY_MAX_BYTES
+        )
+
+    def _import_legacy_cache(self, store):
+        """Copy entries from the old JSON file into the shared cache; True once it is migrated"""
+        json_path = Config.TRANSLATION_CACHE_LEGACY_JSON
         try:
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.translation_cache, f, ensure_ascii=False, indent=2)
-        except:
-            pass
+            with open(json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            store.set_many(
+                (TieredTranslationCache.normalize_key(key), value)
+                for key, value in data.items() if isinstance(value, str)
+            )
+            os.replace(json_path, json_path + '.migrated')
+        except FileNotFoundError:
+            pass  # another worker migrated it first
+        except Exception as e:
+            print(f"Cache migration skipped, unreadable {json_path}: {e}")
+        return True
+
+    def cache_stats(self):
+        """Per-language translation cache hit rates"""
+        return self.translation_cache.stats()
+
+    @staticmethod
+    def _keep_whitespace(original, translated):
+        """Re-apply the original's surrounding whitespace, which is not part of the cache key"""
+        stripped = original.strip()
+        if not stripped:
+            return translated
+        start = original.index(stripped)
+        return original[:start] + translated + original[start + len(stripped):]
 
     def translate_text(self, text, target_language, source_language='en'):
         """Translate text using Google Generative AI with context awareness"""
+        local_text = self._translate_without_llm(text, target_language, source_language)
+        if local_text is not None:
+            return local_text
+        return self._translate_with_llm(text, target_language, source_language)
+
+    def _translate_with_llm(self, text, target_language, source_language):
+        """One LLM translation of text already looked up in the cache; the original text on failure"""
+        try:
+            prompt = self._translation_prompt(text, target_language, source_language)
+            response = llm_client.generate(self.model, prompt, 'translate_text', input_text=text)
+            return self._store_translation(text, target_language, source_language, response.text)
+        except Exception as e:
+            print(f"Translation error for '{text}': {e}")
+            llm_metrics.record_fallback('translate_text')
+            return text
+
+    async def translate_text_async(self, text, target_language, source_language='en'):
+        """translate_text() for the asyncio app; cache and glossary lookups run on a thread"""
+        local_text = await asyncio.to_thread(self._translate_without_llm, text, target_language, source_language)
+        if local_text is not None:
+            return local_text
         
+        try:
+            prompt = self._translation_prompt(text, target_language, source_language)
+            response = await llm_client.generate_async(self.model, prompt, 'translate_text', input_text=text)
+            return await asyncio.to_thread(
+                self._store_translation, text, target_language, source_language, response.text
+            )
+        except Exception as e:
+            print(f"Translation error for '{text}': {e}")
+            llm_metrics.record_fallback('translate_text')
+            return text
+
+    def _translate_without_llm(self, text, target_language, source_language):
+        """The translation when no LLM call is needed (glossary, cache, nothing to do), else None"""
         if target_language == source_language:
             return text
             
         if not text or not text.strip():
             return text
             
-        # Check cache first
-        cache_key = f"{source_language}_{target_language}_{text}"
-        if cache_key in self.translation_cache:
-            return self.translation_cache[cache_key]
+        # Profession names, labels, options and common phrases never need the LLM
+        glossary_text = self._glossary_translate(text, target_language, source_language)
+        if glossary_text is not None:
+            llm_metrics.record_local('translate_text')
+            return glossary_text
+            
+        # Check cache first (keys are whitespace/NFC-normalized)
+        cached = self.translation_cache.get(text, target_language, source_language)
+        if cached is not None:
+            llm_metrics.record_cache('translate_text', True)
+            return self._keep_whitespace(text, cached)
+        llm_metrics.record_cache('translate_text', False)
         
-        # If no API key, return original text
-        if not self.api_key or not self.model:
+        # If no LLM backend is available, return original text
+        if not self.model:
             return text
+        return None
+
+    def _translation_prompt(self, text, target_language, source_language):
+        target_lang_name = self.language_codes.get(target_language, target_language)
+        source_lang_name = self.language_codes.get(source_language, source_language)
         
-        try:
-            target_lang_name = self.language_codes.get(target_language, target_language)
-            source_lang_name = self.language_codes.get(source_language, source_language)
-            
-            prompt = f"""
+        return f"""
             Translate the following text from {source_lang_name} to {target_lang_name}.
             
             CONTEXT: This is for a blue-collar resume building application in India. 
@@ -111,68 +188,188 @@ class AITranslator:
             
             IMPORTANT: Return ONLY the translated text without any additional text, explanations, or notes.
             Do not add any prefixes, suffixes, or formatting marks.
-            
+            {self._glossary_hint([text], target_language, source_language)}
             Text to translate: "{text}"
             
             Translated text:
             """
-            
-            response = self.model.generate_content(prompt)
-            translated_text = response.text.strip()
-            
-            # Clean up the response - remove quotes if present
-            if translated_text.startswith('"') and translated_text.endswith('"'):
-                translated_text = translated_text[1:-1]
-            elif translated_text.startswith("'") and translated_text.endswith("'"):
-                translated_text = translated_text[1:-1]
-            
-            # Remove any explanatory text that might have been added
-            if ':' in translated_text:
-                translated_text = translated_text.split(':', 1)[-1].strip()
-            
-            # Cache the translation
-            self.translation_cache[cache_key] = translated_text
-            self.save_cache()
-            
-            return translated_text
-            
-        except Exception as e:
-            print(f"Translation error for '{text}': {e}")
-            return text
+
+    def _store_translation(self, text, target_language, source_language, response_text):
+        """Clean up a model's translation, cache it and return it"""
+        translated_text = response_text.strip()
+        
+        # Clean up the response - remove quotes if present
+        if translated_text.startswith('"') and translated_text.endswith('"'):
+            translated_text = translated_text[1:-1]
+        elif translated_text.startswith("'") and translated_text.endswith("'"):
+            translated_text = translated_text[1:-1]
+        
+        # Remove any explanatory text that might have been added
+        if ':' in translated_text:
+            translated_text = translated_text.split(':', 1)[-1].strip()
+        
+        # Cache the translation (single-row upsert, no full rewrite)
+        self.translation_cache.set(text, target_language, translated_text, source_language)
+        
+        return self._keep_whitespace(text, translated_text)
 
     def translate_dict(self, data_dict, target_language, source_language='en'):
         """Translate all string values in a dictionary"""
         if target_language == source_language:
             return data_dict
-            
-        translated_dict = {}
-        for key, value in data_dict.items():
-            if isinstance(value, str):
-                translated_dict[key] = self.translate_text(value, target_language, source_language)
-            elif isinstance(value, dict):
-                translated_dict[key] = self.translate_dict(value, target_language, source_language)
-            elif isinstance(value, list):
-                translated_dict[key] = [self.translate_text(item, target_language, source_language) 
-                                      if isinstance(item, str) else item for item in value]
-            else:
-                translated_dict[key] = value
-        return translated_dict
 
-    def batch_translate(self, texts, target_language, source_language='en'):
-        """Translate multiple texts at once"""
+        # Collect every string first so the whole dict costs one batch call
+        strings = []
+        self._collect_strings(data_dict, strings)
+        translated = iter(self.batch_translate(strings, target_language, source_language))
+        return self._replace_strings(data_dict, translated)
+
+    def _collect_strings(self, value, strings):
+        if isinstance(value, str):
+            strings.append(value)
+        elif isinstance(value, dict):
+            for item in value.values():
+                self._collect_strings(item, strings)
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, str):
+                    strings.append(item)
+
+    def _replace_strings(self, value, translated):
+        if isinstance(value, str):
+            return next(translated)
+        if isinstance(value, dict):
+            return {key: self._replace_strings(item, translated) for key, item in value.items()}
+        if isinstance(value, list):
+            return [next(translated) if isinstance(item, str) else item for item in value]
+        return value
+
+    def batch_translate(self, texts, target_language, source_language='en', priority='interactive'):
+        """Translate multiple texts at once with as few LLM calls as possible"""
         if target_language == source_language:
             return texts
-            
-        return [self.translate_text(text, target_language, source_language) for text in texts]
+
+        results = list(texts)
+        pending = {}  # normalized text -> indices waiting for it
+        for i, text in enumerate(texts):
+            if not isinstance(text, str) or not text.strip():
+                continue
+            glossary_text = self._glossary_translate(text, target_language, source_language)
+            if glossary_text is not None:
+                llm_metrics.record_local('translate_batch')
+                results[i] = glossary_text
+                continue
+            cached = self.translation_cache.get(text, target_language, source_language)
+            llm_metrics.record_cache('translate_batch', cached is not None)
+            if cached is not None:
+                results[i] = self._keep_whitespace(text, cached)
+            else:
+                pending.setdefault(normalize_text(text), []).append(i)
+
+        if not pending or not self.model:
+            return results
+
+        unique_texts = list(pending)
+        translations = {}
+        failed = set()  # texts left untranslated after a failed call
+        for chunk in self._chunks(unique_texts):
+            try:
+                translations.update(self._translate_chunk(chunk, target_language, source_language, priority))
+            except LLMJSONError as e:
+                # Malformed output: the per-item fallback below picks these up
+                print(f"Batch translation parse error: {e}")
+            except Exception as e:
+                # Outage, quota or timeout: further calls, batched or per item, would fail the same way
+                print(f"Batch translation error: {e}")
+                llm_metrics.record_fallback('translate_batch')
+                failed.update(text for text in unique_texts if text not in translations)
+                break
+
+        if translations:
+            self.translation_cache.set_many(translations, target_language, source_language)
+
+        for text, indices in pending.items():
+            if text in failed:
+                continue
+            if text in translations:
+                translated = translations[text]
+            else:
+                # Missing or misaligned item: translate it on its own (its cache miss is already counted)
+                translated = self._translate_with_llm(text, target_language, source_language)
+            for i in indices:
+                results[i] = self._keep_whitespace(texts[i], translated)
+        return results
+
+    def _chunks(self, texts):
+        """Split texts into batches capped by item count and total characters"""
+        chunk, size = [], 0
+        for text in texts:
+            if chunk and (len(chunk) >= Config.TRANSLATION_BATCH_MAX_ITEMS or size + len(text) > Config.TRANSLATION_BATCH_MAX_CHARS):
+                yield chunk
+                chunk, size = [], 0
+            chunk.append(text)
+            size += len(text)
+        if chunk:
+            yield chunk
+
+    def _translate_chunk(self, texts, target_language, source_language, priority):
+        """Translate one batch in a single structured call; returns {text: translation}"""
+        target_lang_name = self.language_codes.get(target_language, target_language)
+        source_lang_name = self.language_codes.get(source_language, source_language)
+        items = [{"id": i, "text": text} for i, text in enumerate(texts)]
+
+        prompt = f"""
+        Translate each item's "text" from {source_lang_name} to {target_lang_name}.
+
+        CONTEXT: This is for a blue-collar resume building application in India.
+        The translation should be natural, professional, and appropriate for workers in skilled trades.
+        Use common, easily understandable terms that blue-collar workers would recognize.
+
+        {self._glossary_hint(texts, target_language, source_language)}
+        Return a JSON array with exactly one object per input item, keeping the same "id":
+        [{{"id": 0, "translation": "..."}}]
+
+        Items:
+        {json.dumps(items, ensure_ascii=False)}
+        """
+
+        rows = generate_json(
+            self.model, prompt, BATCH_TRANSLATION_SCHEMA, 'translate_batch',
+            input_text=''.join(texts), priority=priority
+        )
+
+        translations = {}
+        for row in rows:
+            index = row['id']
+            if 0 <= index < len(texts) and row['translation'].strip():
+                translations[texts[index]] = row['translation'].strip()
+        return translations
+
+    def _glossary_translate(self, text, target_language, source_language):
+        if source_language != 'en':
+            return None
+        return self.glossary.translate(text, target_language)
+
+    def _glossary_hint(self, texts, target_language, source_language):
+        """Prompt lines pinning the glossary translation of terms found in texts"""
+        if source_language != 'en':
+            return ''
+        terms = {}
+        for text in texts:
+            terms.update(self.glossary.matches(text, target_language))
+        if not terms:
+            return ''
+        lines = '\n'.join(f"        - {term}: {translation}" for term, translation in terms.items())
+        return f"\n        GLOSSARY: translate these terms exactly as given:\n{lines}\n"
 
     def get_common_phrase(self, phrase_key, language='en'):
         """Get common translated phrases"""
         if language == 'en':
             return self.common_phrases['en'].get(phrase_key, phrase_key)
         
-        # Translate if not English
+        # Compiled catalogs first; only phrases missing from them reach the LLM
         english_phrase = self.common_phrases['en'].get(phrase_key, phrase_key)
-        return self.translate_text(english_phrase, language)
+        return catalogs.translate(english_phrase, language) or self.translate_text(english_phrase, language)
 
 # Global translator instance
 translator = AITranslator()
\ No newline at end of file